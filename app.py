@@ -1,17 +1,18 @@
 import sys
 
-from PyQt5.QtWidgets import (
-    QApplication
-)
-
-from services.csv_analyses import DatasetAnalysesMaker
-from services.report_manager import ReportFileCreator
-from core.dataset_manager import DatasetAnalyzer
 from config import LLMConfig, ReportConfig
-from crewai import LLM
-from ui.main_ui import UI 
+
 
 def main():
+    # Imported here, not at module level: spawned snippet and render workers re-import
+    # this module as `__mp_main__`, and must not pay for Qt and the LLM stack.
+    from PyQt5.QtWidgets import QApplication
+    from crewai import LLM
+    from services.csv_analyses import DatasetAnalysesMaker
+    from services.report_manager import ReportFileCreator
+    from core.dataset_manager import DatasetAnalyzer
+    from ui.main_ui import UI
+
     # Initialize LLM and configuration
     llm_config = LLMConfig()
     llm = LLM(
@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import traceback
+from datetime import datetime
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import LLMConfig, ReportConfig
+from core.dataset_registry import dataset_registry
+from utils.readers import DATASET_EXTENSIONS
+from utils.run_context import end_run
+
+# The analysis stack (crewai, litellm, services) is imported inside the functions that use
+# it: spawned snippet and render workers re-import this module as `__mp_main__`.
+
+
+def find_datasets(source: str, recursive: bool = False) -> List[dict]:
+    """
+    Collect the datasets to analyze from a directory or a manifest file.
+
+    A directory yields every supported dataset file in it (CSV, optionally compressed,
+    Parquet and Arrow/Feather). A `.json` manifest is a list of paths or of objects
+    with a `path` and optional `output_file`, `report_title`, `number_of_analyses` and
+    `dark_theme`. Any other manifest lists one path per line; blank lines and lines
+    starting with `#` are ignored. Relative paths are resolved against the manifest.
+
+    Args:
+        source (str): Directory or manifest path.
+        recursive (bool, optional): Also search subdirectories of a directory.
+
+    Returns:
+        List[dict]: One entry per dataset, each with at least an absolute `path`.
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, dirs, files in os.walk(source):
+            paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(DATASET_EXTENSIONS))
+            if not recursive:
+                break
+        return [{"path": os.path.abspath(path)} for path in sorted(paths)]
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        if source.lower().endswith(".json"):
+            entries = [entry if isinstance(entry, dict) else {"path": entry} for entry in json.load(f)]
+        else:
+            entries = [{"path": line.strip()} for line in f if line.strip() and not line.strip().startswith("#")]
+
+    for entry in entries:
+        entry["path"] = os.path.abspath(os.path.join(base_dir, os.path.expanduser(entry["path"])))
+    return entries
+
+
+def _output_file(entry: dict, output_dir: str, used: set) -> str:
+    # Datasets sharing a file name (in different directories) get numbered reports.
+    if entry.get("output_file"):
+        return os.path.abspath(os.path.join(output_dir, entry["output_file"]))
+    stem = os.path.basename(entry["path"]).split(".")[0] or "dataset"
+    name, counter = f"{stem}.html", 1
+    while name in used:
+        counter += 1
+        name = f"{stem}_{counter}.html"
+    used.add(name)
+    return os.path.abspath(os.path.join(output_dir, name))
+
+
+def _rss_mb() -> Optional[float]:
+    # Current resident memory of this process; None where /proc is unavailable.
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6, 1)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round((peak if sys.platform == "darwin" else peak * 1024) / 1e6, 1)
+
+
+def _build_analyzer(llm: "RateLimitedLLM") -> "DatasetAnalyzer":
+    # CrewAI agents keep per-run state, so every dataset gets its own; the LLM and its limiter are shared.
+    from services.csv_analyses import DatasetAnalysesMaker
+    from services.report_manager import ReportFileCreator
+    from core.dataset_manager import DatasetAnalyzer
+
+    return DatasetAnalyzer(
+        dataset_analyses_maker=DatasetAnalysesMaker(llm=llm, llm_config=LLMConfig()),
+        report_creator=ReportFileCreator(),
+        report_config=ReportConfig(),
+    )
+
+
+def analyze_dataset(entry: dict, llm: "RateLimitedLLM", args: argparse.Namespace) -> dict:
+    """
+    Turn one dataset into a report and describe how it went.
+
+    Per-dataset state (the registry's parsed frame and the run context) is released
+    once the dataset is done, whatever the outcome, so memory stays bounded over a
+    batch of any length. `rss_mb` records this process's resident memory afterwards.
+
+    Args:
+        entry (dict): Dataset entry from `find_datasets`, with its `output_file` set.
+        llm (RateLimitedLLM): Shared rate-limited LLM.
+        args (argparse.Namespace): Parsed command line.
+
+    Returns:
+        dict: Dataset, report path, status ("ok" or "failed"), error, start time,
+            duration and resident memory after the dataset was released.
+    """
+    result = {
+        "dataset": entry["path"],
+        "output_file": entry["output_file"],
+        "status": "ok",
+        "error": None,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "seconds": None,
+        "rss_mb": None,
+    }
+    started = time.perf_counter()
+    try:
+        _build_analyzer(llm).convert_dataset_to_report(
+            csv_path=entry["path"],
+            number_of_analyses=entry.get("number_of_analyses", args.analyses),
+            report_title=entry.get("report_title", args.report_title),
+            footer_text=args.footer_text,
+            output_file=entry["output_file"],
+            page_title=entry.get("report_title", args.report_title),
+            dark_theme=entry.get("dark_theme", args.dark_theme),
+            resume=args.resume,
+        )
+        if not os.path.exists(entry["output_file"]):
+            raise RuntimeError("No report file was written.")
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    finally:
+        dataset_registry.release(entry["path"])
+        end_run(entry["path"])
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    result["rss_mb"] = _rss_mb()
+    return result
+
+
+def write_summary(summary: dict, path: str) -> None:
+    """
+    Write the batch summary as JSON, atomically.
+
+    Args:
+        summary (dict): Summary to write.
+        path (str): Destination file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate analysis reports for many datasets without the GUI."
+    )
+    parser.add_argument("source", help="Directory of datasets, or a manifest (.json list, or one path per line).")
+    parser.add_argument("-o", "--output-dir", default="reports", help="Directory for the HTML reports (default: reports).")
+    parser.add_argument("-j", "--concurrency", type=int, default=2, help="Datasets analyzed at the same time (default: 2).")
+    parser.add_argument("-n", "--analyses", type=int, default=50, help="Number of analyses per dataset (default: 50).")
+    parser.add_argument("--recursive", action="store_true", help="Search subdirectories of a source directory.")
+    parser.add_argument("--dark-theme", action="store_true", help="Use the dark report theme.")
+    parser.add_argument("--resume", action="store_true", help="Continue interrupted runs from their last completed stage.")
+    parser.add_argument("--report-title", default="Dataset Analysis Report", help="Report and page title.")
+    parser.add_argument("--footer-text", default="Generated by Data Analysis Story Teller", help="Report footer.")
+    parser.add_argument("--max-rpm", type=float, default=LLMConfig.max_rpm, help="LLM requests per minute shared by all datasets.")
+    parser.add_argument("--max-tpm", type=float, default=LLMConfig.max_tpm, help="LLM tokens per minute shared by all datasets.")
+    parser.add_argument("--summary", default=None, help="Path of the JSON summary (default: <output-dir>/summary.json).")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Run the batch described on the command line.
+
+    Datasets run on a thread pool of `--concurrency` workers. Every LLM call of every
+    dataset, from the agents and from the insight requests, waits on the one
+    process-wide limiter, so the quota holds whatever the concurrency.
+
+    Returns:
+        int: Exit status; 1 if any dataset failed, 2 if there was nothing to analyze.
+    """
+    args = parse_args(argv)
+
+    entries, seen = [], set()
+    for entry in find_datasets(args.source, args.recursive):
+        # Run state is keyed by dataset path, so a dataset listed twice is analyzed once.
+        if entry["path"] in seen:
+            print(f"Skipping duplicate dataset entry: {entry['path']}")
+            continue
+        seen.add(entry["path"])
+        entries.append(entry)
+    if not entries:
+        print(f"No datasets found in {args.source}")
+        return 2
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    used_names = set()
+    for entry in entries:
+        entry["output_file"] = _output_file(entry, args.output_dir, used_names)
+
+    from utils.rate_limiter import RateLimitedLLM, llm_rate_limiter
+
+    llm_rate_limiter.configure(args.max_rpm, args.max_tpm)
+    llm = RateLimitedLLM(model=LLMConfig.model_name, api_key=LLMConfig.api_key, limiter=llm_rate_limiter)
+
+    summary_path = args.summary or os.path.join(args.output_dir, "summary.json")
+    started_at = datetime.now().isoformat(timespec="seconds")
+    started = time.perf_counter()
+    results = []
+
+    print(f"Analyzing {len(entries)} datasets, {args.concurrency} at a time.")
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        futures = {executor.submit(analyze_dataset, entry, llm, args): entry for entry in entries}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"[{len(results)}/{len(entries)}] {result['status']} in {result['seconds']} s: {result['dataset']}")
+
+    order = {entry["path"]: index for index, entry in enumerate(entries)}
+    results.sort(key=lambda result: order[result["dataset"]])
+    failed = sum(result["status"] != "ok" for result in results)
+    write_summary({
+        "started_at": started_at,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "concurrency": args.concurrency,
+        "max_rpm": args.max_rpm,
+        "max_tpm": args.max_tpm,
+        "peak_rss_mb": _peak_rss_mb(),
+        "datasets": len(results),
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }, summary_path)
+
+    print(f"Done: {len(results) - failed} succeeded, {failed} failed. Summary written to {os.path.abspath(summary_path)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
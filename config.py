@@ -1,4 +1,6 @@
+import os
 from dataclasses import dataclass
+from typing import Optional
 
 
 
@@ -11,6 +13,7 @@ class LLMConfig:
     api_key: str = "your-gemini-api"
     max_iter = 3
     max_rpm = 10
+    max_tpm = 1_000_000
 
     plotly_light_theme_command = 'use plotly light theme for all plots'
     plotly_dark_theme_command = 'use plotly dark theme for all plots'
@@ -28,7 +31,32 @@ class InsightsLLMConfig:
 )
 
 
-    time_to_sleep_between_requests: int = 15
+    max_concurrent_requests: int = 8
+    estimated_tokens_per_image: int = 258
+    expected_output_tokens: int = 200
+    batch_size: int = 4  # figures packed into one request; 1 sends one figure per request
+    batch_max_bytes: int = 3 * 1024 * 1024  # base64 image payload allowed per batched request
+
+    # Encoding of the images uploaded for insights; the report keeps the full PNG.
+    upload_format: str = "webp"  # "webp", "jpeg", "png" (palette-quantized) or "original"
+    upload_max_side: int = 768  # longest side in pixels; Gemini bills up to 768x768 as one tile
+    upload_quality: int = 80
+    upload_min_quality: int = 40
+    upload_palette_colors: int = 64
+    upload_max_bytes: int = 60_000  # per image, before base64
+    upload_cache_max_bytes: int = 16 * 1024 * 1024  # encoded upload images kept in memory for retries
+
+    # "image" sends every chart to the vision model; "text" sends bar, line, histogram
+    # and box charts as a numeric summary to `text_model_name` and skips rendering them.
+    insights_mode: str = "image"
+    text_model_name: str = "gemini/gemini-2.0-flash-lite"
+    text_insights_command: str = (
+    "The JSON below summarizes a chart: its title, axis labels and, per trace, the aggregated values "
+    "(category totals sorted from largest, line trends with first/last points and slope, or distribution statistics). "
+    "Turn it into a short narrative of insights. Highlight only the most impactful trends, patterns, and anomalies, "
+    "showing what they mean rather than just describing numbers. Keep it simple, actionable, and under 100 words. "
+    "Write the insights directly without introductions or filler, and do not mention the JSON."
+)
      
     retry_upon_fall = False
     max_retries = 3
@@ -43,7 +71,100 @@ class ReportConfig:
     light_theme_file_path: str = "./templates/report_light_theme.html"
     dark_theme_file_path: str = "./templates/report_dark_theme.html"
     block_file_path: str = "./templates/page_block.html"
+    lazy_charts_file_path: str = "./templates/lazy_charts.html"
     output_file: str = "styled_report.html"
     dark_theme: bool = False
+    plotlyjs_mode: str = "cdn"  # "cdn" or "inline" (offline bundle for air-gapped viewers)
+    lazy_charts: bool = True
+
+
+@dataclass
+class FigureExecutionConfig:
+    max_workers: int = os.cpu_count() or 1
+    snippet_timeout: float = 120
+    start_method: str = "spawn"
+    memory_limit_mb: Optional[int] = 2048  # virtual address space (RLIMIT_AS, not RSS) a snippet may add on top of the worker's baseline; None disables
+    cpu_time_limit: Optional[float] = 120  # CPU seconds per snippet; None disables
+    max_jobs_per_worker: int = 50  # workers are recycled after this many snippets
+
+
+@dataclass
+class FigureRenderConfig:
+    max_workers: int = min(4, os.cpu_count() or 1)
+    start_method: str = "spawn"
+    image_format: str = "png"
+    render_timeout: float = 60  # seconds one figure may take once the batch is waiting on it
+
+
+@dataclass
+class CacheConfig:
+    insights_cache_dir: str = "./.cache/insights"
+    insights_cache_max_bytes: int = 64 * 1024 * 1024
+    stage_cache_enabled: bool = True
+    stage_cache_dir: str = "./.cache/stages"
+    stage_cache_max_bytes: int = 512 * 1024 * 1024
+    figure_store_dir: str = "./.cache/figures"
+    figure_store_max_bytes: int = 1024 * 1024 * 1024
+    columnar_shadow_enabled: bool = True  # keep an Arrow copy of each CSV input
+    columnar_shadow_dir: str = "./.cache/columnar"
+    columnar_shadow_max_bytes: int = 8 * 1024 * 1024 * 1024
+    registry_max_datasets: int = 4  # parsed datasets each process keeps in memory, least recently used dropped first
+
+
+@dataclass
+class PipelineConfig:
+    parallel_branches: bool = True
+    checkpoint_enabled: bool = True  # persist stage outputs and per-figure insights so a run can resume
+    checkpoint_dir: str = "./.runs"
+
+
+@dataclass
+class ProfilingConfig:
+    top_k: int = 5
+    quantiles: tuple = (0.25, 0.5, 0.75)
+    parallel: bool = False
+    max_workers: int = os.cpu_count() or 1
+    approximate_threshold_bytes: int = 256 * 1024 * 1024  # files above this are profiled with sketches; None disables
+    sketch_chunk_size: int = 200_000
+    hll_precision: int = 14  # ~0.8% relative error on distinct counts
+    kll_k: int = 200
+    frequent_items_capacity: int = 1000
+    reservoir_size: int = 64
+
+
+@dataclass
+class IngestionConfig:
+    out_of_core_threshold_bytes: int = 1024 * 1024 * 1024  # files above this are streamed, not loaded
+    chunk_size: int = 200_000
+    dtype_sample_rows: int = 10_000
+    working_frame_rows: int = 500_000  # rows of the sampled frame snippets run against
+    max_tracked_values: int = 100_000
+    seed: int = 0
 
 
+@dataclass
+class DtypeConfig:
+    optimize_on_load: bool = False  # downcast numerics / categorize strings when a dataset is loaded
+    categorize_strings: bool = True
+    category_max_unique: int = 1000
+    category_max_unique_ratio: float = 0.5
+
+
+@dataclass
+class SnippetValidationConfig:
+    enabled: bool = True
+    regenerate: bool = True  # send invalid snippets back to the code model in one batch
+    max_regeneration_rounds: int = 1
+    max_category_values: int = 50  # category values accepted as derived column names
+
+
+@dataclass
+class DigestConfig:
+    token_budget: int = 2000
+    histogram_bins: int = 10
+    top_k: int = 5
+    max_correlations: int = 10
+    max_correlation_columns: int = 30
+    sample_rows: int = 20
+    max_strata: int = 20
+    seed: int = 0
@@ -44,7 +44,8 @@ class DatasetAnalyzer:
         output_file: str = "styled_report.html",
         page_title: str = "Dataset Report",
         dark_theme: bool = False,
-        callback_func: any = None
+        callback_func: any = None,
+        resume: bool = False
     ) -> bool:
         """
         Converts a CSV dataset into a structured analysis report.
@@ -61,12 +62,13 @@ class DatasetAnalyzer:
             page_title (str, optional): Page title for the report. Defaults to "Dataset Report".
             dark_theme (bool, optional): Whether to use the dark theme. Defaults to False.
             callback_func (any, optional): Optional callback for progress updates.
+            resume (bool, optional): Continue the last interrupted run on this dataset. Defaults to False.
 
         Returns:
             bool: True if the report was generated successfully.
         """
         analyses_data: AllCodesWithInsights = self.dataset_analyses_maker.turn_csv_dataset_into_analysis(
-            csv_path, number_of_analyses, dark_theme, callback_func
+            csv_path, number_of_analyses, dark_theme, callback_func, resume
         )
 
         if dark_theme:
@@ -81,7 +83,11 @@ class DatasetAnalyzer:
             output_file=output_file,
             report_title=report_title,
             page_title=page_title,
-            footer_text=footer_text
+            footer_text=footer_text,
+            csv_path=csv_path,
+            plotlyjs_mode=self.report_config.plotlyjs_mode,
+            lazy_charts=self.report_config.lazy_charts,
+            lazy_charts_file_path=self.report_config.lazy_charts_file_path
         )
 
 
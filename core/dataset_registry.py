@@ -0,0 +1,310 @@
+import os
+import hashlib
+import threading
+import builtins
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from schemas.schemas import ColumnInfo, DataFrameSummary
+from config import CacheConfig, DtypeConfig
+from utils.dtypes import optimize_dtypes
+from utils.ingestion import is_out_of_core, load_ingested_csv
+from utils.readers import dataset_format, read_dataset
+
+
+DatasetKey = Tuple[str, int, int]
+
+
+class DatasetRegistry:
+    """
+    Process-wide cache of parsed datasets, keyed by path, modification time and size.
+
+    CSV (plain or compressed), Parquet and Arrow IPC/Feather files are supported;
+    Arrow files are memory-mapped, and CSV files get a columnar shadow copy so
+    later loads skip text parsing (see `utils.readers`).
+
+    Every snippet executor asks the registry for its `data` frame instead of calling
+    `pd.read_csv` itself, so a file is parsed once per process no matter how many
+    snippets run against it. Frames handed out are shallow copies; snippets are
+    executed under pandas copy-on-write so writes never reach the cached frame.
+
+    Files larger than `IngestionConfig.out_of_core_threshold_bytes` are streamed in
+    chunks instead: the registry keeps a bounded reservoir sample as the working frame
+    and the profile of the full file computed during the same pass. Both are stored in
+    the columnar cache, so the file is streamed once, by the first process to load it.
+
+    At most `CacheConfig.registry_max_datasets` frames are kept, least recently used
+    dropped first; `release` drops a dataset as soon as its run is over.
+
+    Attributes:
+        _frames (OrderedDict[DatasetKey, pd.DataFrame]): Parsed (or sampled) frames by
+            dataset key, least recently used first.
+        _profiles (Dict[DatasetKey, Tuple[DataFrameSummary, List[ColumnInfo]]]):
+            Full-file profiles of streamed datasets.
+        _lock (threading.Lock): Guards the caches and serializes first loads.
+    """
+
+    def __init__(self):
+        self._frames: "OrderedDict[DatasetKey, pd.DataFrame]" = OrderedDict()
+        self._profiles: Dict[DatasetKey, Tuple[DataFrameSummary, List[ColumnInfo]]] = {}
+        self._fingerprints: Dict[DatasetKey, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def dataset_key(file_path: str) -> DatasetKey:
+        """
+        Build the cache key of a dataset file.
+
+        Args:
+            file_path (str): Path to the dataset file.
+
+        Returns:
+            DatasetKey: Absolute path, mtime in nanoseconds and size in bytes.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        abs_path = os.path.abspath(file_path)
+        stat = os.stat(abs_path)
+        return abs_path, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _hash_file(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load(self, key: DatasetKey) -> pd.DataFrame:
+        # Called with the lock held.
+        is_csv = dataset_format(key[0]) == "csv"
+        if is_csv and is_out_of_core(key[0]):
+            fingerprint = self._fingerprints.get(key) or self._hash_file(key[0])
+            self._fingerprints[key] = fingerprint
+            ingested = load_ingested_csv(key[0], fingerprint)
+            self._profiles[key] = (ingested.summary, ingested.columns_info)
+            frame = ingested.frame
+        else:
+            fingerprint = None
+            if is_csv and CacheConfig.columnar_shadow_enabled:
+                fingerprint = self._fingerprints.get(key) or self._hash_file(key[0])
+                self._fingerprints[key] = fingerprint
+            frame = read_dataset(key[0], fingerprint)
+
+        if DtypeConfig.optimize_on_load:
+            optimization = optimize_dtypes(frame)
+            print(f"Optimized dtypes of {key[0]}: {optimization.bytes_before / 1e6:.1f} MB -> "
+                  f"{optimization.bytes_after / 1e6:.1f} MB ({optimization.bytes_saved / 1e6:.1f} MB saved, "
+                  f"{len(optimization.converted)} columns converted)")
+            frame = optimization.frame
+        return frame
+
+    def get_frame(self, file_path: str) -> pd.DataFrame:
+        """
+        Return the cached frame for a dataset, parsing the file on first use.
+
+        Stale entries for the same path (older mtime or different size) are dropped.
+
+        Args:
+            file_path (str): Path to the dataset file.
+
+        Returns:
+            pd.DataFrame: The shared, cached frame. Callers must not mutate it;
+            use `get_view` to obtain a private view.
+        """
+        key = self.dataset_key(file_path)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                return frame
+            self._drop(key[0], keep=key)
+            frame = self._load(key)
+            self._frames[key] = frame
+            while len(self._frames) > max(1, CacheConfig.registry_max_datasets):
+                oldest = next(iter(self._frames))
+                self._drop(oldest[0])
+            return frame
+
+    def _drop(self, abs_path: str, keep: Optional[DatasetKey] = None) -> None:
+        # Called with the lock held; forgets every cached version of a path except `keep`.
+        for cache in (self._frames, self._profiles, self._fingerprints):
+            for stale_key in [k for k in cache if k[0] == abs_path and k != keep]:
+                del cache[stale_key]
+
+    def release(self, file_path: str) -> None:
+        """
+        Forget a dataset: its frame, full-file profile and fingerprint.
+
+        Called once a run over the dataset is finished, so a batch over many datasets
+        holds at most the ones still in progress. A later `get_frame` loads it again
+        (from the columnar cache when there is one).
+
+        Args:
+            file_path (str): Path to the dataset file.
+        """
+        with self._lock:
+            self._drop(os.path.abspath(file_path))
+
+    def get_profile(self, file_path: str) -> Optional[Tuple[DataFrameSummary, List[ColumnInfo]]]:
+        """
+        Return the full-file profile of a dataset that was streamed out of core.
+
+        Args:
+            file_path (str): Path to the dataset file.
+
+        Returns:
+            Optional[Tuple[DataFrameSummary, List[ColumnInfo]]]: Summary and column details
+            of the whole file, or None if the dataset was loaded in full (its frame is exact).
+        """
+        key = self.dataset_key(file_path)
+        self.get_frame(file_path)
+        with self._lock:
+            return self._profiles.get(key)
+
+    def get_view(self, file_path: str) -> pd.DataFrame:
+        """
+        Return a cheap private view of the cached frame.
+
+        The view shares column buffers with the cached frame. Use it inside
+        `copy_on_write()` so that in-place edits copy the touched columns first.
+
+        Args:
+            file_path (str): Path to the dataset file.
+
+        Returns:
+            pd.DataFrame: A shallow copy of the cached frame.
+        """
+        with copy_on_write():
+            return self.get_frame(file_path).copy(deep=False)
+
+    def fingerprint(self, file_path: str) -> str:
+        """
+        Return a content hash of a dataset file, computed once per (path, mtime, size).
+
+        Args:
+            file_path (str): Path to the dataset file.
+
+        Returns:
+            str: Hex SHA-256 digest of the file bytes.
+        """
+        key = self.dataset_key(file_path)
+        with self._lock:
+            cached = self._fingerprints.get(key)
+        if cached is not None:
+            return cached
+
+        fingerprint = self._hash_file(key[0])
+        with self._lock:
+            for stale_key in [k for k in self._fingerprints if k[0] == key[0] and k != key]:
+                del self._fingerprints[stale_key]
+            self._fingerprints[key] = fingerprint
+        return fingerprint
+
+    def is_registered_path(self, file_path, dataset_path: str) -> bool:
+        """
+        Check whether `file_path` refers to the same file as `dataset_path`.
+
+        Args:
+            file_path: Candidate path passed by a snippet (may be a buffer or URL).
+            dataset_path (str): Path of the dataset the snippet runs against.
+
+        Returns:
+            bool: True if both resolve to the same file on disk.
+        """
+        if not isinstance(file_path, (str, os.PathLike)):
+            return False
+        try:
+            return os.path.samefile(file_path, dataset_path)
+        except OSError:
+            return False
+
+    def clear(self) -> None:
+        """Drop every cached frame."""
+        with self._lock:
+            self._frames.clear()
+            self._profiles.clear()
+            self._fingerprints.clear()
+
+
+def copy_on_write():
+    """
+    Context manager enabling pandas copy-on-write for the enclosed block.
+
+    Returns:
+        pd.option_context: Option context with `mode.copy_on_write` set.
+    """
+    return pd.option_context("mode.copy_on_write", True)
+
+
+class _PandasProxy:
+    """
+    Stand-in for the `pandas` module inside a snippet namespace.
+
+    Attribute access is forwarded to pandas, except `read_csv`, `read_parquet`
+    and `read_feather` of the dataset path, which are answered from the registry
+    instead of re-reading the file (whatever its actual format).
+    """
+
+    def __init__(self, registry: DatasetRegistry, dataset_path: str):
+        self._registry = registry
+        self._dataset_path = dataset_path
+
+    def __getattr__(self, name):
+        return getattr(pd, name)
+
+    def _read(self, reader, path, args, kwargs):
+        if not args and not kwargs and self._registry.is_registered_path(path, self._dataset_path):
+            return self._registry.get_view(self._dataset_path)
+        return reader(path, *args, **kwargs)
+
+    def read_csv(self, filepath_or_buffer, *args, **kwargs):
+        return self._read(pd.read_csv, filepath_or_buffer, args, kwargs)
+
+    def read_parquet(self, path, *args, **kwargs):
+        return self._read(pd.read_parquet, path, args, kwargs)
+
+    def read_feather(self, path, *args, **kwargs):
+        return self._read(pd.read_feather, path, args, kwargs)
+
+
+def build_snippet_namespace(dataset_path: str, registry: "DatasetRegistry" = None, **extra) -> dict:
+    """
+    Build the globals dict a generated snippet is executed in.
+
+    The namespace exposes `data` (a private view of the cached dataset), a `pd`
+    proxy whose `read_csv` hits the registry, and an `__import__` hook so that
+    `import pandas as pd` inside the snippet also resolves to the proxy.
+
+    Args:
+        dataset_path (str): Path to the dataset the snippet runs against.
+        registry (DatasetRegistry, optional): Registry to use. Defaults to the shared one.
+        **extra: Additional names to expose (e.g. `px`, `datetime`).
+
+    Returns:
+        dict: Globals for `exec`.
+    """
+    registry = registry or dataset_registry
+    pandas_proxy = _PandasProxy(registry, dataset_path)
+
+    def _import(name, globals=None, locals=None, fromlist=(), level=0):
+        if name == "pandas" and not fromlist and level == 0:
+            return pandas_proxy
+        return builtins.__import__(name, globals, locals, fromlist, level)
+
+    snippet_builtins = dict(vars(builtins))
+    snippet_builtins["__import__"] = _import
+
+    namespace = {
+        "__builtins__": snippet_builtins,
+        "pd": pandas_proxy,
+        "data": registry.get_view(dataset_path),
+    }
+    namespace.update(extra)
+    return namespace
+
+
+dataset_registry = DatasetRegistry()
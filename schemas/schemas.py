@@ -1,11 +1,11 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Union, Tuple
+from typing import List, Optional, Dict, Any, Union, Tuple, Literal
 
 
 # Schemas
 
 class CSVFilePath(BaseModel):    
-    file_path: str = Field(..., description="Path to the CSV file to be read into a DataFrame.")
+    file_path: str = Field(..., description="Path to the dataset file to be read into a DataFrame (CSV, optionally compressed, Parquet or Arrow/Feather).")
 
 
 
@@ -16,6 +16,10 @@ class ColumnInfo(BaseModel):
     num_missing: int
     num_unique: int
     sample_values: List[Any] = Field(default_factory=list)
+    min: Optional[Any] = None
+    max: Optional[Any] = None
+    quantiles: Optional[Dict[str, Any]] = None
+    top_values: Optional[List[Dict[str, Any]]] = None
 
 class DataFrameSummary(BaseModel):
     num_rows: int
@@ -24,12 +28,22 @@ class DataFrameSummary(BaseModel):
     dtypes: Dict[str, str]
     missing_values: Dict[str, int]
 
+class DatasetDigest(BaseModel):
+    num_rows: int
+    histograms: Dict[str, Dict[str, List[Any]]] = Field(default_factory=dict, description="Numeric column -> bin_edges and counts.")
+    top_categories: Dict[str, List[Dict[str, Any]]] = Field(default_factory=dict, description="Non-numeric column -> most frequent values with counts.")
+    correlations: List[Dict[str, Any]] = Field(default_factory=list, description="Strongest pairwise Pearson correlations between numeric columns.")
+    stratified_by: Optional[str] = None
+    sample_rows: List[Dict[str, Any]] = Field(default_factory=list, description="Small sample of rows, stratified on `stratified_by` when set.")
+    token_estimate: int = 0
+
 class DataFrameInfo(BaseModel):
     file_path: str
     summary: DataFrameSummary
     columns_info: List[ColumnInfo]
     sample_data: List[Dict[str, Any]] = Field(default_factory=list)
-    raw_dataframe: Optional[List[Dict[str, Any]]] 
+    digest: Optional[DatasetDigest] = None
+    raw_dataframe: Optional[List[Dict[str, Any]]] = None
 
     class Config:
         arbitrary_types_allowed = True  # Allow pandas types if needed
@@ -79,6 +93,27 @@ class FigureCodeWithImage(BaseModel):
         description="Base64 encoded image data representing the figure"
     )
 
+    figure_json: Optional[str] = Field(
+        None,
+        description="The Plotly figure serialized with fig.to_json(), if the code produced one"
+    )
+
+    status: Literal["ok", "error", "timeout", "memory_exceeded", "cpu_time_exceeded", "crashed", "render_failed"] = Field(
+        "ok",
+        description="Outcome of executing the code; anything but 'ok' means no figure was produced, "
+                    "except 'render_failed', where the figure exists but its image could not be exported"
+    )
+
+    error: Optional[str] = Field(
+        None,
+        description="Why execution or image export failed, when status is not 'ok'"
+    )
+
+    summary: Optional[str] = Field(
+        None,
+        description="Compact JSON summary of the figure's data, sent instead of the image in text insights mode"
+    )
+
 
 class FiguresCodeWithImage(BaseModel):
     figures: List[FigureCodeWithImage] = Field(
@@ -20,10 +20,19 @@ from schemas.schemas import (
     AnalysisCode, CSVFilePath, DataFrameInfo, AnalysisRecommendation,
     CodesWithInsights, AllCodesWithInsights
 )
-from utils.utils import convert_codes_to_insights, create_dataframe_info
-from config import LLMConfig
+from utils.utils import codes_to_insights_tool, create_dataframe_info
+from utils.disk_cache import DiskCache
+from utils.run_context import start_run, end_run, get_run_context
+from utils.run_checkpoint import RunCheckpoint, STAGE_NAMES
+from core.dataset_registry import dataset_registry
+from config import LLMConfig, CacheConfig, PipelineConfig
+
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
 
 from crewai import Crew, Task, LLM
+from crewai.tasks.task_output import TaskOutput
+from crewai.tasks.output_format import OutputFormat
 
 
 class DatasetAnalysesMaker:
@@ -42,7 +51,10 @@ class DatasetAnalysesMaker:
         simple_analysis_code_agent (Agent): Agent for generating simple Plotly code.
         intermediate_analysis_code_agent (Agent): Agent for generating intermediate Plotly code.
         advanced_analysis_code_agent (Agent): Agent for generating advanced Plotly code.
-        codes_to_insights_agent (Agent): Agent for converting Plotly code to insights.
+        codes_to_insights_agent (Agent): Agent for converting simple Plotly code to insights.
+        intermediate_codes_to_insights_agent (Agent): Agent for converting intermediate Plotly code to insights.
+        advanced_codes_to_insights_agent (Agent): Agent for converting advanced Plotly code to insights.
+        stage_cache (DiskCache): Task outputs memoized by dataset fingerprint, prompt and model.
     """
 
     def __init__(self, llm: LLM, llm_config: LLMConfig,):
@@ -54,13 +66,18 @@ class DatasetAnalysesMaker:
             llm_config (LLMConfig): Configuration object specifying agent iteration and rate limits.
         """
         self.llm = llm
+        self.stage_cache = DiskCache(CacheConfig.stage_cache_dir, CacheConfig.stage_cache_max_bytes)
 
         self.data_reader_agent = DataReaderAgent(llm=self.llm, tools=[create_dataframe_info]).make_agent()
         self.analysis_recommender_agent = AnalysisDataRecommenderAgent(self.llm).make_agent()
         self.simple_analysis_code_agent = SimpleAnalysisPlotlyCodeAgent(self.llm).make_agent()
         self.intermediate_analysis_code_agent = IntermediateAnalysisPlotlyCodeAgent(self.llm).make_agent()
         self.advanced_analysis_code_agent = AdvancedAnalysisPlotlyCodeAgent(self.llm).make_agent()
-        self.codes_to_insights_agent = CodesToInsightsAgent(self.llm, [convert_codes_to_insights]).make_agent()
+        # One insights agent per category branch, so the branches can run concurrently; each
+        # tool is labelled with its checkpoint stage, which owns the snippets it claims in a run
+        self.codes_to_insights_agent = CodesToInsightsAgent(self.llm, [codes_to_insights_tool("simple_insights")]).make_agent()
+        self.intermediate_codes_to_insights_agent = CodesToInsightsAgent(self.llm, [codes_to_insights_tool("intermediate_insights")]).make_agent()
+        self.advanced_codes_to_insights_agent = CodesToInsightsAgent(self.llm, [codes_to_insights_tool("advanced_insights")]).make_agent()
 
         for agent in [
             self.simple_analysis_code_agent,
@@ -72,7 +89,7 @@ class DatasetAnalysesMaker:
             agent.max_iter = llm_config.max_iter
             agent.max_rpm = llm_config.max_rpm
 
-    def turn_csv_dataset_into_analysis(self, csv_path: str, number_of_analyses: int, dark_theme: bool = False, callback_func:any = None) -> AllCodesWithInsights:
+    def turn_csv_dataset_into_analysis(self, csv_path: str, number_of_analyses: int, dark_theme: bool = False, callback_func:any = None, resume: bool = False) -> AllCodesWithInsights:
         """
         Runs the full CrewAI workflow to analyze a CSV dataset and generate insights.
 
@@ -83,10 +100,15 @@ class DatasetAnalysesMaker:
         - Converts code to insights using multimodal reasoning.
         - Returns all insights in a structured AllCodesWithInsights object.
 
+        With `PipelineConfig.checkpoint_enabled`, every stage output, executed figure and
+        figure insight is saved to the run directory as it completes (see `RunCheckpoint`).
+
         Args:
             csv_path (str): Path to the CSV file to analyze.
             number_of_analyses (int): Total number of analyses to generate (split across categories).
             dark_theme_command (str, optional): Command to apply dark theme to all plots. Defaults to None.
+            resume (bool, optional): Continue an interrupted run from its last completed stage
+                (and, within an insights stage, its last completed figure) instead of starting over.
 
         Returns:
             AllCodesWithInsights: Structured insights for simple, intermediate, and advanced analyses.
@@ -228,7 +250,7 @@ class DatasetAnalysesMaker:
             "If the insights fails and get an error, do not include it",
             expected_output="CodesWithInsights object containing insights for each intermediate analysis."
             "Make Sure you do not generate slashes '/' in the generated output",
-            agent=self.codes_to_insights_agent,
+            agent=self.intermediate_codes_to_insights_agent,
             input_pydantic=AnalysisCode,
             output_pydantic=CodesWithInsights,
             context=[intermediate_analysis_code_task, dataframe_info_task],
@@ -243,7 +265,7 @@ class DatasetAnalysesMaker:
             "If the insights fails and get an error, do not include it",
             expected_output="CodesWithInsights object containing insights for each advanced analysis."
             "Make Sure you do not generate slashes '/' in the generated output",
-            agent=self.codes_to_insights_agent,
+            agent=self.advanced_codes_to_insights_agent,
             input_pydantic=AnalysisCode,
             output_pydantic=CodesWithInsights,
             context=[advanced_analysis_code_task, dataframe_info_task],
@@ -252,32 +274,267 @@ class DatasetAnalysesMaker:
 
         )
 
-        crew = Crew(
-            agents=[
-                self.data_reader_agent,
-                self.analysis_recommender_agent,
-                self.simple_analysis_code_agent,
-                self.intermediate_analysis_code_agent,
-                self.advanced_analysis_code_agent,
-                self.codes_to_insights_agent,
-            ],
-            tasks=[
-                dataframe_info_task,
-                recommending_analysis_task,
-                simple_analysis_code_task,
-                intermediate_analysis_code_task,
-                advanced_analysis_code_task,
-                simple_codes_to_insights_task,
-                intermediate_codes_to_insights_task,
-                advanced_codes_to_insights_task,
-            ],
-            verbose=True,
-        )
-
-        result = crew.kickoff(inputs={"file_path": csv_path})
+        all_tasks = [
+            dataframe_info_task,
+            recommending_analysis_task,
+            simple_analysis_code_task,
+            intermediate_analysis_code_task,
+            advanced_analysis_code_task,
+            simple_codes_to_insights_task,
+            intermediate_codes_to_insights_task,
+            advanced_codes_to_insights_task,
+        ]
+        stage_keys = self._stage_keys(all_tasks, csv_path)
+        rerun_ids = set()
+
+        checkpoint = None
+        if PipelineConfig.checkpoint_enabled:
+            checkpoint = RunCheckpoint.for_dataset(
+                csv_path, dataset_registry.fingerprint(csv_path), number_of_analyses, dark_theme, resume
+            )
+        stage_names = {id(task): stage_name for task, stage_name in zip(all_tasks, STAGE_NAMES)}
+
+        # Load the dataset here, before any snippet worker asks for it: a large file is then
+        # streamed once and the workers load the stored working frame (even when the
+        # profiling stage is restored from a checkpoint and never touches the file).
+        dataset_registry.get_frame(csv_path)
+
+        # Run-scoped state: snippets duplicated across the three branches are executed once
+        start_run(csv_path, checkpoint)
+        try:
+            self._run_stages(all_tasks, csv_path, stage_keys, rerun_ids, callback_func, stage_names)
+        finally:
+            run_context = end_run(csv_path)
+            if run_context is not None:
+                print(run_context.report())
 
         return AllCodesWithInsights(
             simple=simple_codes_to_insights_task.output.pydantic,
             intermediate=intermediate_codes_to_insights_task.output.pydantic,
             advanced=advanced_codes_to_insights_task.output.pydantic
         )
+
+    def _run_stages(self, all_tasks: List[Task], csv_path: str, stage_keys: dict, rerun_ids: set, callback_func=None, stage_names: dict = None) -> None:
+        """
+        Kick off the pipeline tasks, running the three category branches concurrently
+        when `PipelineConfig.parallel_branches` is set.
+
+        Args:
+            all_tasks (List[Task]): Data-info, recommendation, the three code tasks and
+                the three insights tasks, in that order.
+            csv_path (str): Path of the dataset the tasks run on.
+            stage_keys (dict): Cache keys by task id, from `_stage_keys`.
+            rerun_ids (set): Ids of tasks re-run so far in this analysis; updated in place.
+            callback_func (callable, optional): Task callback.
+            stage_names (dict, optional): Checkpoint stage name by task id.
+        """
+        (dataframe_info_task, recommending_analysis_task,
+         simple_analysis_code_task, intermediate_analysis_code_task, advanced_analysis_code_task,
+         simple_codes_to_insights_task, intermediate_codes_to_insights_task, advanced_codes_to_insights_task) = all_tasks
+
+        if PipelineConfig.parallel_branches:
+            # Code generation and insights of each category depend only on the shared
+            # data-info and recommendation stages, so the three branches run side by side.
+            self._kickoff_with_stage_cache(
+                [dataframe_info_task, recommending_analysis_task],
+                csv_path, stage_keys, rerun_ids, callback_func, stage_names,
+            )
+            branches = [
+                [simple_analysis_code_task, simple_codes_to_insights_task],
+                [intermediate_analysis_code_task, intermediate_codes_to_insights_task],
+                [advanced_analysis_code_task, advanced_codes_to_insights_task],
+            ]
+            # Every branch is restored before any of them runs, so the snippets of restored
+            # insights stages are claimed in the run before a live branch executes its own.
+            pending_branches = [
+                self._restore_stages(branch, csv_path, stage_keys, rerun_ids, callback_func, stage_names)
+                for branch in branches
+            ]
+            with ThreadPoolExecutor(max_workers=len(branches)) as executor:
+                futures = [
+                    executor.submit(self._kickoff_pending, pending, csv_path)
+                    for pending in pending_branches if pending
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            self._kickoff_with_stage_cache(all_tasks, csv_path, stage_keys, rerun_ids, callback_func, stage_names)
+
+    def _stage_key(self, task: Task, dataset_fingerprint: str, stage_keys: dict) -> str:
+        """
+        Build the stage cache key of a task.
+
+        The key covers the dataset content, the task prompt, the model and the keys of
+        the task's context tasks, so a change anywhere upstream invalidates the task.
+
+        Args:
+            task (Task): Task to key.
+            dataset_fingerprint (str): Content hash of the dataset.
+            stage_keys (dict): Keys of already-keyed tasks, by task id.
+
+        Returns:
+            str: Cache key.
+        """
+        context = task.context if isinstance(task.context, list) else []
+        return DiskCache.make_key(
+            dataset_fingerprint,
+            task.description,
+            task.expected_output,
+            getattr(self.llm, "model", ""),
+            *[stage_keys[id(context_task)] for context_task in context],
+        )
+
+    def _restore_stage(self, task: Task, cached: dict) -> TaskOutput:
+        return TaskOutput(
+            description=task.description,
+            expected_output=task.expected_output,
+            raw=cached["raw"],
+            pydantic=task.output_pydantic.model_validate(cached["pydantic"]),
+            agent=task.agent.role,
+            output_format=OutputFormat.PYDANTIC,
+        )
+
+    def _stage_keys(self, tasks: List[Task], csv_path: str) -> dict:
+        """
+        Compute the stage cache key of every task, in execution order.
+
+        Args:
+            tasks (List[Task]): All tasks of the run, upstream tasks first.
+            csv_path (str): Path of the dataset the tasks run on.
+
+        Returns:
+            dict: Cache key by task id.
+        """
+        dataset_fingerprint = dataset_registry.fingerprint(csv_path)
+        stage_keys = {}
+        for task in tasks:
+            stage_keys[id(task)] = self._stage_key(task, dataset_fingerprint, stage_keys)
+        return stage_keys
+
+    def _kickoff_with_stage_cache(
+        self,
+        tasks: List[Task],
+        csv_path: str,
+        stage_keys: dict,
+        rerun_ids: set,
+        callback_func: any = None,
+        stage_names: dict = None,
+    ) -> None:
+        """
+        Run the given tasks as a Crew, skipping tasks whose output is already memoized.
+
+        Cached tasks get their `output` restored and are left out of the Crew; the tasks
+        that remain still see them as context. A task is re-run if it misses the cache or
+        if any of its context tasks was re-run. Fresh outputs are stored as each task completes.
+
+        Args:
+            tasks (List[Task]): Tasks in execution order. Their context tasks must already
+                have run (here or in an earlier call sharing `rerun_ids`).
+            csv_path (str): Path of the dataset the tasks run on.
+            stage_keys (dict): Cache keys by task id, from `_stage_keys`.
+            rerun_ids (set): Ids of tasks re-run so far in this analysis; updated in place.
+            callback_func (any, optional): Progress callback, also invoked for cached tasks.
+            stage_names (dict, optional): Checkpoint stage name by task id. Named tasks are
+                restored from the run checkpoint when possible and saved to it on completion.
+        """
+        pending = self._restore_stages(tasks, csv_path, stage_keys, rerun_ids, callback_func, stage_names)
+        self._kickoff_pending(pending, csv_path)
+
+    def _restore_stages(
+        self,
+        tasks: List[Task],
+        csv_path: str,
+        stage_keys: dict,
+        rerun_ids: set,
+        callback_func: any = None,
+        stage_names: dict = None,
+    ) -> List[Task]:
+        """
+        Restore the memoized outputs of the given tasks and prepare the rest to run.
+
+        Outputs come from the run checkpoint first, then from the stage cache. The
+        snippets of a restored insights stage are claimed in the run context, so no
+        other branch of the run executes them again. Tasks left to run get a callback
+        that stores their output and are marked as re-run.
+
+        Args:
+            tasks (List[Task]): Tasks in execution order. Their context tasks must already
+                have run (here or in an earlier call sharing `rerun_ids`).
+            csv_path (str): Path of the dataset the tasks run on.
+            stage_keys (dict): Cache keys by task id, from `_stage_keys`.
+            rerun_ids (set): Ids of tasks re-run so far in this analysis; updated in place.
+            callback_func (any, optional): Progress callback, also invoked for cached tasks.
+            stage_names (dict, optional): Checkpoint stage name by task id. Named tasks are
+                restored from the run checkpoint when possible and saved to it on completion.
+
+        Returns:
+            List[Task]: Tasks that still have to run, in execution order.
+        """
+        pending = []
+        run_context = get_run_context(csv_path)
+        checkpoint = run_context.checkpoint if run_context is not None else None
+        stage_names = stage_names or {}
+
+        for task in tasks:
+            key = stage_keys[id(task)]
+            stage_name = stage_names.get(id(task))
+            context = task.context if isinstance(task.context, list) else []
+            upstream_rerun = any(id(context_task) in rerun_ids for context_task in context)
+
+            cached = None
+            if checkpoint is not None and stage_name and not upstream_rerun:
+                cached = checkpoint.load_stage(stage_name, key)
+                if cached is not None:
+                    print(f"Restored completed stage '{stage_name}' from {checkpoint.run_dir}")
+            if cached is None and CacheConfig.stage_cache_enabled and not upstream_rerun:
+                cached = self.stage_cache.get(key)
+                if cached is not None:
+                    print(f"Stage cache hit: {task.description[:60]}...")
+                    if checkpoint is not None and stage_name:
+                        checkpoint.save_stage(stage_name, key, cached["raw"], cached["pydantic"])
+
+            if cached is not None:
+                task.output = self._restore_stage(task, cached)
+                if run_context is not None and isinstance(task.output.pydantic, CodesWithInsights):
+                    run_context.claim_snippets(
+                        [result.code for result in task.output.pydantic.codes_with_insights],
+                        stage_name or "",
+                    )
+                if callback_func:
+                    callback_func(task.output)
+                continue
+
+            task.callback = self._storing_callback(key, callback_func, checkpoint, stage_name)
+            pending.append(task)
+            rerun_ids.add(id(task))
+
+        return pending
+
+    def _kickoff_pending(self, pending: List[Task], csv_path: str) -> None:
+        """
+        Run the tasks left over by `_restore_stages` as one Crew.
+
+        Args:
+            pending (List[Task]): Tasks to run, in execution order.
+            csv_path (str): Path of the dataset the tasks run on.
+        """
+        if not pending:
+            return
+
+        crew = Crew(
+            agents=list({id(task.agent): task.agent for task in pending}.values()),
+            tasks=pending,
+            verbose=True,
+        )
+        crew.kickoff(inputs={"file_path": csv_path})
+
+    def _storing_callback(self, key: str, callback_func: any = None, checkpoint: RunCheckpoint = None, stage_name: str = None):
+        def _callback(output: TaskOutput):
+            if CacheConfig.stage_cache_enabled and output.pydantic is not None:
+                self.stage_cache.set(key, {"raw": output.raw, "pydantic": output.pydantic.model_dump()})
+            if checkpoint is not None and stage_name and output.pydantic is not None:
+                checkpoint.save_stage(stage_name, key, output.raw, output.pydantic.model_dump())
+            if callback_func:
+                callback_func(output)
+        return _callback
+
@@ -0,0 +1,270 @@
+import json
+import time
+import atexit
+import threading
+import multiprocessing
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import List, Optional, Tuple
+
+from config import FigureRenderConfig
+
+
+@dataclass
+class RenderResult:
+    """
+    Outcome of rendering one figure.
+
+    Attributes:
+        image_bytes (bytes): Encoded image, or None if rendering failed.
+        latency (float): Seconds spent rendering inside the worker.
+        error (str): Error message when rendering failed.
+    """
+    image_bytes: Optional[bytes]
+    latency: float
+    error: Optional[str] = None
+
+
+def _warm_renderer() -> None:
+    """
+    Worker initializer: start a persistent Kaleido browser and render a throwaway figure.
+
+    Kaleido >= 1.1 exposes a sync server that keeps one Chrome instance alive for every
+    `pio.to_image` call in the process; older Kaleido keeps its own subprocess alive after
+    the first export. Either way, the warm-up render pays the start-up cost before any
+    real figure arrives. The sync server is only started once a one-shot render has proven
+    that a browser is available, since it cannot recover from a missing Chrome.
+    """
+    import plotly.io as pio
+
+    try:
+        pio.to_image({"data": [{"type": "bar", "x": [0], "y": [0]}], "layout": {}}, format="png", validate=False)
+    except Exception:
+        return
+
+    try:
+        import kaleido
+        if hasattr(kaleido, "start_sync_server"):
+            kaleido.start_sync_server(silence_warnings=True)
+    except Exception:
+        pass
+
+
+def _render_one(figure_json: str, image_format: str, width: Optional[int], height: Optional[int], scale: Optional[float]) -> RenderResult:
+    import plotly.io as pio
+
+    start = time.perf_counter()
+    try:
+        image_bytes = pio.to_image(
+            json.loads(figure_json),
+            format=image_format,
+            width=width,
+            height=height,
+            scale=scale,
+            validate=False,
+        )
+        return RenderResult(image_bytes=image_bytes, latency=time.perf_counter() - start)
+    except Exception as e:
+        return RenderResult(image_bytes=None, latency=time.perf_counter() - start, error=str(e))
+
+
+def _noop() -> None:
+    return None
+
+
+class FigureRendererPool:
+    """
+    Pool of long-lived, pre-warmed static image export workers.
+
+    Each worker keeps its Kaleido renderer alive between figures, so the per-figure cost is
+    the drawing itself rather than browser start-up and IPC setup. Figures are submitted as
+    JSON and rendered concurrently across workers.
+
+    Attributes:
+        max_workers (int): Number of renderer processes.
+    """
+
+    def __init__(self, max_workers: int = None, start_method: str = None):
+        """
+        Initialize the pool without starting any worker.
+
+        Args:
+            max_workers (int, optional): Renderer process count. Defaults to FigureRenderConfig.max_workers.
+            start_method (str, optional): multiprocessing start method. Defaults to FigureRenderConfig.start_method.
+        """
+        self.max_workers = max(1, max_workers or FigureRenderConfig.max_workers)
+        self._context = multiprocessing.get_context(start_method or FigureRenderConfig.start_method)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Bumped whenever the executor is torn down, so callers can tell their own failures from resets by others.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> "FigureRendererPool":
+        """
+        Spawn and warm every worker.
+
+        Returns:
+            FigureRendererPool: self, for chaining.
+        """
+        executor = self._get_executor()
+        for future in [executor.submit(_noop) for _ in range(self.max_workers)]:
+            future.result()
+        return self
+
+    def render_batch(
+        self,
+        figure_jsons: List[str],
+        image_format: str = None,
+        width: int = None,
+        height: int = None,
+        scale: float = None,
+        timeout: float = None,
+    ) -> List[RenderResult]:
+        """
+        Render a batch of figures concurrently.
+
+        Several callers may render on the pool at once. A figure that does not finish
+        within `timeout` seconds of the batch waiting on it gets an error result, and the
+        pool is replaced to kill its hung worker. When a worker crashes, the figures of
+        the batch still pending are retried one at a time on a private single-worker pool,
+        so a figure that crashes again there is certainly the culprit and gets an error
+        result. Figures lost to a pool reset started by another caller are resubmitted
+        without penalty. Either way, the other figures still render.
+
+        Args:
+            figure_jsons (List[str]): Plotly figures serialized with `fig.to_json()`.
+            image_format (str, optional): Output format. Defaults to FigureRenderConfig.image_format.
+            width (int, optional): Image width in pixels. Defaults to Plotly's default.
+            height (int, optional): Image height in pixels. Defaults to Plotly's default.
+            scale (float, optional): Resolution multiplier. Defaults to Plotly's default.
+            timeout (float, optional): Per-figure timeout. Defaults to FigureRenderConfig.render_timeout.
+
+        Returns:
+            List[RenderResult]: One result per figure, in input order.
+        """
+        image_format = image_format or FigureRenderConfig.image_format
+        timeout = timeout or FigureRenderConfig.render_timeout
+        args = (image_format, width, height, scale)
+        results: List[Optional[RenderResult]] = [None] * len(figure_jsons)
+
+        suspects = self._render_shared(figure_jsons, args, timeout, results)
+        if suspects:
+            self._render_isolated(figure_jsons, suspects, args, timeout, results)
+        return results
+
+    def shutdown(self) -> None:
+        """Stop all renderer workers."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    # ---------- Internal helpers ----------
+
+    def _render_shared(self, figure_jsons: List[str], args: tuple, timeout: float, results: list) -> List[int]:
+        # Renders on the shared pool; returns the figures left pending by a crash of this batch.
+        pending = list(range(len(figure_jsons)))
+        while pending:
+            executor, generation = self._get_executor()
+            futures = {index: executor.submit(_render_one, figure_jsons[index], *args) for index in pending}
+            retry, suspects, broken, crashed = [], [], False, False
+            for index in pending:
+                future = futures[index]
+                if broken:
+                    # The pool is being torn down; keep finished renders and redo the rest.
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        results[index] = future.result()
+                    else:
+                        (suspects if crashed else retry).append(index)
+                    continue
+                try:
+                    results[index] = future.result(timeout=timeout)
+                except FuturesTimeoutError:
+                    results[index] = RenderResult(image_bytes=None, latency=timeout, error=f"render timed out after {timeout:g} s")
+                    self._reset_executor(generation)
+                    broken = True
+                except Exception:
+                    broken = True
+                    if self._is_current(generation):
+                        # Possibly one of ours: isolate everything still pending.
+                        crashed = True
+                        suspects.append(index)
+                        self._reset_executor(generation)
+                    else:
+                        # Another caller replaced the pool under us; not this figure's fault.
+                        retry.append(index)
+            if crashed:
+                return suspects + retry
+            pending = retry
+        return []
+
+    def _render_isolated(self, figure_jsons: List[str], indices: List[int], args: tuple, timeout: float, results: list) -> None:
+        # One figure at a time on a private pool: a crash or hang here names its figure exactly.
+        executor = None
+        for index in indices:
+            if executor is None:
+                executor = self._new_executor(1)
+                executor.submit(_noop).result()
+            future = executor.submit(_render_one, figure_jsons[index], *args)
+            try:
+                results[index] = future.result(timeout=timeout)
+            except FuturesTimeoutError:
+                results[index] = RenderResult(image_bytes=None, latency=timeout, error=f"render timed out after {timeout:g} s")
+            except Exception as e:
+                results[index] = RenderResult(image_bytes=None, latency=0.0, error=f"renderer crashed: {e}")
+            else:
+                continue
+            _terminate(executor)
+            executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _new_executor(self, max_workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=self._context, initializer=_warm_renderer)
+
+    def _get_executor(self) -> Tuple[ProcessPoolExecutor, int]:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor(self.max_workers)
+            return self._executor, self._generation
+
+    def _is_current(self, generation: int) -> bool:
+        with self._lock:
+            return generation == self._generation
+
+    def _reset_executor(self, generation: int) -> None:
+        # Only the first caller to see a broken pool replaces it; later callers find a newer generation.
+        with self._lock:
+            if self._executor is None or generation != self._generation:
+                return
+            _terminate(self._executor)
+            self._executor = None
+            self._generation += 1
+
+
+def _terminate(executor: ProcessPoolExecutor) -> None:
+    # Hung workers never pick up the shutdown sentinel, so they are terminated explicitly.
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+_shared_renderer: Optional[FigureRendererPool] = None
+_shared_lock = threading.Lock()
+
+
+def get_figure_renderer() -> FigureRendererPool:
+    """
+    Return the process-wide FigureRendererPool, starting and warming it on first use.
+
+    Returns:
+        FigureRendererPool: Shared renderer pool configured from FigureRenderConfig.
+    """
+    global _shared_renderer
+    with _shared_lock:
+        if _shared_renderer is None:
+            _shared_renderer = FigureRendererPool().start()
+            atexit.register(_shared_renderer.shutdown)
+        return _shared_renderer
@@ -2,13 +2,16 @@ import os
 import sys
 import html
 import traceback
-from datetime import datetime
-from typing import Iterable, List, Tuple
+from typing import Callable, Iterable, Optional, Tuple
 
 import plotly.express as px
-import pandas as pd
+import plotly.io as pio
+import plotly.offline
 
 from schemas.schemas import AllCodesWithInsights, CodesWithInsights, CodeWithInsights
+from services.snippet_executor import get_snippet_executor
+from utils.figure_store import load_figure
+from utils.templates import CompiledTemplate, load_template
 
 try:
     import markdown as md
@@ -22,34 +25,50 @@ class ReportFileCreator:
     Generates a styled HTML report from Plotly visualizations and insights.
 
     The report is composed of:
-      - A wrapper theme file (global structure, CSS, and {{blocks}} placeholder)
+      - A wrapper theme file (global structure, CSS, {{plotlyjs}} and {{scripts}} in the
+        head, {{blocks}} placeholder)
       - A reusable block template (used for each visualization/insight pair)
+      - A single plotly.js payload (CDN link or inline bundle) shared by every chart
+
+    Both templates are compiled once into render plans (cached per path and mtime)
+    and rendered in a single pass directly into the output file.
 
     Responsibilities:
-      - Execute provided Plotly code safely to produce figures
+      - Reuse the figures rendered during the insight stage, executing the provided
+        Plotly code only for figures that were never produced
       - Render insights (Markdown if available, fallback to HTML escaping)
-      - Insert generated blocks into the wrapper template
-      - Write the final report as an HTML file
+      - Emit each chart eagerly, or as a JSON data island hydrated when scrolled into view
+      - Stream the wrapper head, each generated block and the wrapper tail
+        to the report file as they are produced
     """
 
     # ---------- Internal helpers ----------
 
-    def _exec_code_and_get_fig(self, code_str: str):
+    def _exec_code_and_get_fig(self, code_str: str, csv_path: Optional[str] = None):
         """
-        Execute Python code containing Plotly figure creation logic.
+        Get the figure of a Python code snippet containing Plotly figure creation logic.
+
+        The figure produced when the insights were generated is reused from the figure
+        store; the code is executed only if no stored figure exists, and then in the
+        sandboxed SnippetExecutor workers (timeout, memory and CPU caps), never in-process.
 
         Args:
             code_str (str): Python code expected to define a `fig` object.
+            csv_path (str, optional): Dataset exposed to the code as `data`, served
+                from the workers' dataset registry.
 
         Returns:
             plotly.graph_objects.Figure: A Plotly figure (dark-themed, fixed size).
         """
-        local_ns, global_ns = {}, {"px": px, "pd": pd, "datetime": datetime}
         try:
-            exec(code_str, global_ns, local_ns)
-            fig = local_ns.get("fig") or global_ns.get("fig")
-            if fig is None:
-                raise RuntimeError("No 'fig' object found in executed code.")
+            figure_json = load_figure(code_str, csv_path) if csv_path else None
+            if figure_json is not None:
+                fig = pio.from_json(figure_json, skip_invalid=True)
+            else:
+                result = get_snippet_executor().submit(code_str, csv_path).result()
+                if result.figure_json is None:
+                    raise RuntimeError(f"Snippet failed ({result.status}): {result.error}")
+                fig = pio.from_json(result.figure_json, skip_invalid=True)
 
             fig.update_layout(template="plotly_dark", width=600, height=400)
             return fig
@@ -85,30 +104,33 @@ class ReportFileCreator:
 
     def _render_chart_block(
         self,
-        block_template: str,
+        write: Callable[[str], object],
+        block_template: CompiledTemplate,
         code: str,
         insights: str,
         index: int,
         section: str,
         report_title: str,
         footer_text: str,
-    ) -> str:
+        csv_path: Optional[str] = None,
+        lazy_charts: bool = False,
+    ) -> None:
         """
-        Render one chart + insights block.
+        Render one chart + insights block straight into `write`.
 
         Args:
-            block_template (str): HTML block template with placeholders.
+            write (Callable[[str], object]): Output sink, e.g. the report file's `write`.
+            block_template (CompiledTemplate): Compiled HTML block template.
             code (str): Python code string generating a Plotly figure.
             insights (str): Insights text (MD or plain).
             index (int): Block index.
             section (str): Section label (e.g. "Simple Analysis").
             report_title (str): Report title for placeholders.
             footer_text (str): Footer text to insert.
-
-        Returns:
-            str: Rendered HTML block.
+            csv_path (str, optional): Dataset the code runs against.
+            lazy_charts (bool, optional): Emit the figure as a data island rendered on scroll.
         """
-        fig = self._exec_code_and_get_fig(code)
+        fig = self._exec_code_and_get_fig(code, csv_path)
 
         fig_title = None
         try:
@@ -119,21 +141,57 @@ class ReportFileCreator:
 
         title = html.escape(fig_title or f"Data Visualization {index}")
         insights_html = self._insights_to_html(insights or "")
-        chart_html = fig.to_html(full_html=False, include_plotlyjs="cdn", config={"responsive": True})
-
-        rendered = block_template
-        for key, value in {
-            "{{title}}": title,
-            "{{chart}}": chart_html,
-            "{{insights}}": insights_html,
-            "{{footer_text}}": footer_text,
-            "{{report_title}}": html.escape(report_title),
-            "{{section}}": html.escape(section or ""),
-            "{{index}}": str(index),
-        }.items():
-            rendered = rendered.replace(key, value)
-
-        return rendered
+        if lazy_charts:
+            chart_html = self._lazy_chart_html(fig, index)
+        else:
+            chart_html = fig.to_html(full_html=False, include_plotlyjs=False, config={"responsive": True})
+
+        block_template.render_to(write, {
+            "title": title,
+            "chart": chart_html,
+            "insights": insights_html,
+            "footer_text": footer_text,
+            "report_title": html.escape(report_title),
+            "section": html.escape(section or ""),
+            "index": str(index),
+        })
+
+    def _lazy_chart_html(self, fig, index: int) -> str:
+        """
+        Render a chart placeholder plus its figure JSON in an inert data island.
+
+        Args:
+            fig (plotly.graph_objects.Figure): Figure to embed.
+            index (int): Block index, used for the island id.
+
+        Returns:
+            str: Placeholder div and `application/json` script tag.
+        """
+        island_id = f"figure-data-{index}"
+        width = fig.layout.width or 600
+        height = fig.layout.height or 400
+        figure_json = fig.to_json().replace("</", "<\\/")
+        return (
+            f'<div class="lazy-chart" data-figure="{island_id}" style="width:{width}px;height:{height}px"></div>\n'
+            f'<script type="application/json" id="{island_id}">{figure_json}</script>'
+        )
+
+    def _plotlyjs_html(self, plotlyjs_mode: str) -> str:
+        """
+        Build the single plotly.js payload shared by every chart of the report.
+
+        Args:
+            plotlyjs_mode (str): "cdn" for a versioned CDN link, "inline" for the full offline bundle.
+
+        Returns:
+            str: Script tag loading plotly.js.
+        """
+        if plotlyjs_mode == "inline":
+            return f'<script type="text/javascript">{plotly.offline.get_plotlyjs()}</script>'
+        if plotlyjs_mode == "cdn":
+            version = plotly.offline.get_plotlyjs_version()
+            return f'<script src="https://cdn.plot.ly/plotly-{version}.min.js" charset="utf-8"></script>'
+        raise ValueError(f"Unknown plotlyjs_mode: {plotlyjs_mode!r} (expected 'cdn' or 'inline')")
 
     def _iter_items(self, payload: AllCodesWithInsights) -> Iterable[Tuple[str, CodeWithInsights]]:
         """
@@ -166,9 +224,15 @@ class ReportFileCreator:
         report_title: str = "Report",
         page_title: str = "Dark Styled Report",
         footer_text: str = "Generated By Me",
+        csv_path: Optional[str] = None,
+        plotlyjs_mode: str = "cdn",
+        lazy_charts: bool = False,
+        lazy_charts_file_path: Optional[str] = None,
     ) -> None:
         """
-        Build and save the full HTML report.
+        Build and save the full HTML report, writing each block to disk as soon as
+        it is rendered so memory stays bounded by one block and a partial report
+        can be opened while a long run is still in progress.
 
         Args:
             data (AllCodesWithInsights): Dataset containing visualization code & insights.
@@ -178,37 +242,65 @@ class ReportFileCreator:
             report_title (str): Title used inside the report.
             page_title (str): HTML <title> value.
             footer_text (str): Footer text injected into each block.
+            csv_path (str, optional): Dataset the visualization code runs against.
+            plotlyjs_mode (str): "cdn" or "inline"; plotly.js is emitted once either way.
+            lazy_charts (bool): Render each chart only when its block scrolls into view.
+            lazy_charts_file_path (str, optional): Path to the hydration script template,
+                required when `lazy_charts` is set.
         """
         if not os.path.exists(theme_file_path):
             raise FileNotFoundError(f"Wrapper file not found: {theme_file_path}")
         if not os.path.exists(block_file_path):
             raise FileNotFoundError(f"Block file not found: {block_file_path}")
 
-        with open(theme_file_path, "r", encoding="utf-8") as f:
-            wrapper_html = f.read()
-        with open(block_file_path, "r", encoding="utf-8") as f:
-            block_template = f.read()
-
-        blocks: List[str] = []
-        for idx, (section, item) in enumerate(self._iter_items(data), start=1):
-            block_html = self._render_chart_block(
-                block_template=block_template,
-                code=item.code,
-                insights=item.insights,
-                index=idx,
-                section=section,
-                report_title=report_title,
-                footer_text=footer_text,
-            )
-            blocks.append(block_html)
-
-        final_html = wrapper_html
-        final_html = final_html.replace("{{blocks}}", "\n".join(blocks))
-        final_html = final_html.replace("{{page_title}}", html.escape(page_title))
-        final_html = final_html.replace("{{report_title}}", html.escape(report_title))
+        wrapper_template = load_template(theme_file_path)
+        block_template = load_template(block_file_path)
+
+        # plotly.js must load before the first block: eager blocks call Plotly.newPlot inline.
+        scripts = []
+        if lazy_charts:
+            if not lazy_charts_file_path or not os.path.exists(lazy_charts_file_path):
+                raise FileNotFoundError(f"Lazy charts script file not found: {lazy_charts_file_path}")
+            scripts.append(load_template(lazy_charts_file_path).source)
+
+        if "plotlyjs" not in wrapper_template.placeholders:
+            wrapper_template = CompiledTemplate(wrapper_template.source.replace("</head>", "{{plotlyjs}}\n</head>"))
+        if "scripts" not in wrapper_template.placeholders:
+            wrapper_template = CompiledTemplate(wrapper_template.source.replace("</head>", "{{scripts}}\n</head>"))
+        wrapper_head, wrapper_tail = wrapper_template.split("blocks")
+
+        wrapper_values = {
+            "page_title": html.escape(page_title),
+            "report_title": html.escape(report_title),
+            "plotlyjs": self._plotlyjs_html(plotlyjs_mode),
+            "scripts": "\n".join(scripts),
+        }
 
+        # Stream the report: the wrapper head (with plotly.js and the hydration script) is
+        # written first, so the partial file already renders every block written so far;
+        # each block goes straight into the file as soon as it is ready, and the wrapper
+        # is closed at the end.
         with open(output_file, "w", encoding="utf-8") as f:
-            f.write(final_html)
+            wrapper_head.render_to(f.write, wrapper_values)
+            f.flush()
+
+            for idx, (section, item) in enumerate(self._iter_items(data), start=1):
+                self._render_chart_block(
+                    write=f.write,
+                    block_template=block_template,
+                    code=item.code,
+                    insights=item.insights,
+                    index=idx,
+                    section=section,
+                    report_title=report_title,
+                    footer_text=footer_text,
+                    csv_path=csv_path,
+                    lazy_charts=lazy_charts,
+                )
+                f.write("\n")
+                f.flush()
+
+            wrapper_tail.render_to(f.write, wrapper_values)
 
         print(f"✅ Report saved to: {os.path.abspath(output_file)}")
 
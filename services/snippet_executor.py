@@ -0,0 +1,378 @@
+import base64
+import atexit
+import itertools
+import os
+import signal
+import threading
+import time
+import queue
+import multiprocessing
+from multiprocessing.connection import wait
+from concurrent.futures import Future
+from typing import List, Optional
+
+from schemas.schemas import FigureCodeWithImage
+from config import FigureExecutionConfig
+
+
+_READY = "ready"
+_MAX_START_FAILURES = 3
+
+
+def _failed_figure(code: str, message: str, status: str = "error") -> FigureCodeWithImage:
+    return FigureCodeWithImage(
+        code=code,
+        figure_img_base64=base64.b64encode(
+            f"Code execution failed: {message}".encode("utf-8")
+        ).decode("utf-8"),
+        status=status,
+        error=message,
+    )
+
+
+def _address_space_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _limit(resource_module, kind: int, soft: int) -> None:
+    _, hard = resource_module.getrlimit(kind)
+    if hard != resource_module.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource_module.setrlimit(kind, (soft, hard))
+
+
+def _apply_memory_limit(memory_limit_mb: Optional[int]) -> None:
+    # The cap is headroom over what the worker maps once `utils.snippet_runner` (pandas,
+    # plotly, the dataset registry) is imported, so it does not depend on unrelated libraries.
+    # RLIMIT_AS bounds virtual address space, not resident memory: reserved but untouched
+    # mappings (thread stacks, allocator arenas) count against it too.
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    baseline = _address_space_bytes()
+    if baseline is not None:
+        _limit(resource, resource.RLIMIT_AS, baseline + memory_limit_mb * 1024 * 1024)
+
+
+def _apply_cpu_budget(cpu_time_limit: Optional[float]) -> None:
+    # RLIMIT_CPU counts the whole process lifetime, so move the limit forward for every job.
+    if not cpu_time_limit:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _limit(resource, resource.RLIMIT_CPU, int(usage.ru_utime + usage.ru_stime + cpu_time_limit) + 1)
+
+
+def _worker_main(conn, memory_limit_mb: Optional[int] = None, cpu_time_limit: Optional[float] = None) -> None:
+    """
+    Worker process loop: receive (job_id, code, csv_path), send back (job_id, FigureCodeWithImage)
+    carrying the executed figure as JSON; rendering happens in the FigureRendererPool.
+
+    The worker announces itself once its imports are done, so start-up time never counts
+    against a snippet's timeout. The dataset is parsed by the worker's own dataset registry
+    on the first job that needs it and reused for every later job against the same file.
+
+    On POSIX systems the worker caps its address space and gives every snippet a CPU-time
+    budget; exceeding the budget terminates the process with SIGXCPU, while exhausting
+    memory surfaces as a MemoryError reported with status "memory_exceeded".
+    """
+    # Imported before the baseline is measured; keep this module light (see utils.snippet_runner).
+    from utils.snippet_runner import execute_plotly_code
+
+    _apply_memory_limit(memory_limit_mb)
+    conn.send(_READY)
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        job_id, code, csv_path = job
+        _apply_cpu_budget(cpu_time_limit)
+        try:
+            result = execute_plotly_code(code, csv_path)
+        except MemoryError:
+            result = _failed_figure(code, f"memory limit of {memory_limit_mb} MB exceeded", "memory_exceeded")
+        except Exception as e:
+            result = _failed_figure(code, str(e))
+        conn.send((job_id, result))
+
+
+class _Job:
+    def __init__(self, job_id: int, code: str, csv_path: str):
+        self.job_id = job_id
+        self.code = code
+        self.csv_path = csv_path
+        self.future: Future = Future()
+
+
+class _Worker:
+    def __init__(self, context, memory_limit_mb: Optional[int], cpu_time_limit: Optional[float]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, memory_limit_mb, cpu_time_limit), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.job: Optional[_Job] = None
+        self.started_at: float = 0.0
+        self.jobs_done = 0
+
+    def assign(self, job: _Job) -> None:
+        self.job = job
+        self.started_at = time.monotonic()
+        self.conn.send((job.job_id, job.code, job.csv_path))
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class SnippetExecutor:
+    """
+    Long-lived pool of sandboxed worker processes that execute generated Plotly snippets in parallel.
+
+    Jobs from any number of concurrent callers share one pool. Results are returned in
+    submission order. Every snippet runs under a wall-clock timeout, and on POSIX systems
+    under a memory cap and a CPU-time budget. A snippet that breaks a limit or crashes
+    its worker comes back as a failed figure with a structured `status` ("timeout",
+    "memory_exceeded", "cpu_time_exceeded", "crashed" or "error") and the worker is
+    replaced, so it never blocks other snippets. Workers are also recycled after
+    `max_jobs_per_worker` snippets so leaked state cannot build up.
+
+    Attributes:
+        max_workers (int): Upper bound on live worker processes.
+        snippet_timeout (float): Wall-clock seconds a single snippet may run.
+        memory_limit_mb (Optional[int]): Extra virtual address space (RLIMIT_AS, not RSS) a
+            worker may map for snippets, over its baseline after importing pandas and plotly.
+        cpu_time_limit (Optional[float]): CPU seconds a single snippet may use.
+        max_jobs_per_worker (int): Snippets a worker runs before it is replaced.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        snippet_timeout: float = None,
+        start_method: str = None,
+        memory_limit_mb: Optional[int] = None,
+        cpu_time_limit: Optional[float] = None,
+        max_jobs_per_worker: int = None,
+    ):
+        """
+        Initialize the executor. Workers are spawned lazily as jobs arrive.
+
+        Args:
+            max_workers (int, optional): Worker count. Defaults to FigureExecutionConfig.max_workers.
+            snippet_timeout (float, optional): Per-snippet timeout in seconds.
+                Defaults to FigureExecutionConfig.snippet_timeout.
+            start_method (str, optional): multiprocessing start method.
+                Defaults to FigureExecutionConfig.start_method.
+            memory_limit_mb (int, optional): Memory cap in MB. Defaults to FigureExecutionConfig.memory_limit_mb.
+            cpu_time_limit (float, optional): CPU-time budget per snippet in seconds.
+                Defaults to FigureExecutionConfig.cpu_time_limit.
+            max_jobs_per_worker (int, optional): Recycling interval.
+                Defaults to FigureExecutionConfig.max_jobs_per_worker.
+        """
+        self.max_workers = max(1, max_workers or FigureExecutionConfig.max_workers)
+        self.snippet_timeout = snippet_timeout or FigureExecutionConfig.snippet_timeout
+        self.memory_limit_mb = memory_limit_mb or FigureExecutionConfig.memory_limit_mb
+        self.cpu_time_limit = cpu_time_limit or FigureExecutionConfig.cpu_time_limit
+        self.max_jobs_per_worker = max(1, max_jobs_per_worker or FigureExecutionConfig.max_jobs_per_worker)
+        self._context = multiprocessing.get_context(start_method or FigureExecutionConfig.start_method)
+
+        self._pending: "queue.Queue[_Job]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._start_failures = 0
+        self._closed = False
+
+    # ---------- Public API ----------
+
+    def submit(self, code: str, csv_path: str) -> Future:
+        """
+        Queue one snippet for execution.
+
+        Args:
+            code (str): Plotly snippet.
+            csv_path (str): Dataset exposed to the snippet as `data`.
+
+        Returns:
+            Future: Resolves to a FigureCodeWithImage with `figure_json` set on success.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("SnippetExecutor has been shut down.")
+            job = _Job(next(self._job_ids), code, csv_path)
+            self._pending.put(job)
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+                self._dispatcher.start()
+        return job.future
+
+    def run(self, codes: List[str], csv_path: str) -> List[FigureCodeWithImage]:
+        """
+        Execute snippets in parallel and return their figures in input order.
+
+        Args:
+            codes (List[str]): Plotly snippets.
+            csv_path (str): Dataset the snippets run against.
+
+        Returns:
+            List[FigureCodeWithImage]: One entry per snippet, in the order given.
+        """
+        futures = [self.submit(code, csv_path) for code in codes]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """Stop all workers and fail any job that has not finished."""
+        with self._lock:
+            self._closed = True
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout=self.snippet_timeout)
+        for worker in self._workers:
+            if worker.job is not None and not worker.job.future.done():
+                worker.job.future.set_result(_failed_figure(worker.job.code, "executor shut down", "crashed"))
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.kill()
+        self._workers.clear()
+        while not self._pending.empty():
+            job = self._pending.get_nowait()
+            job.future.set_result(_failed_figure(job.code, "executor shut down", "crashed"))
+
+    # ---------- Internal helpers ----------
+
+    def _dispatch_loop(self) -> None:
+        while not self._closed:
+            self._assign_pending()
+
+            busy = [w for w in self._workers if w.job is not None or not w.ready]
+            if not busy:
+                if self._pending.empty():
+                    with self._lock:
+                        if self._pending.empty():
+                            self._dispatcher = None
+                            return
+                continue
+
+            ready = wait(
+                [w.conn for w in busy] + [w.process.sentinel for w in busy],
+                timeout=0.1,
+            )
+            for worker in busy:
+                if not worker.ready:
+                    self._await_start(worker, ready)
+                elif worker.conn in ready:
+                    self._collect(worker)
+                elif worker.process.sentinel in ready:
+                    worker.process.join(timeout=1)
+                    self._replace_crashed(worker)
+                elif time.monotonic() - worker.started_at > self.snippet_timeout:
+                    self._replace(worker, f"timed out after {self.snippet_timeout:g}s", "timeout")
+
+    def _assign_pending(self) -> None:
+        idle = [w for w in self._workers if w.ready and w.job is None]
+        starting = sum(1 for w in self._workers if not w.ready)
+        while not self._pending.empty():
+            if idle:
+                idle.pop().assign(self._pending.get_nowait())
+                continue
+            if starting >= self._pending.qsize() or len(self._workers) >= self.max_workers:
+                return
+            self._workers.append(_Worker(self._context, self.memory_limit_mb, self.cpu_time_limit))
+            starting += 1
+
+    def _await_start(self, worker: _Worker, ready: list) -> None:
+        if worker.conn in ready:
+            try:
+                worker.ready = worker.conn.recv() == _READY
+            except (EOFError, OSError):
+                pass
+        if worker.ready:
+            self._start_failures = 0
+        elif worker.process.sentinel in ready:
+            worker.kill()
+            self._workers.remove(worker)
+            self._start_failures += 1
+            if self._start_failures >= _MAX_START_FAILURES:
+                # Workers cannot even start (broken environment): fail fast instead of respawning forever.
+                self._start_failures = 0
+                while not self._pending.empty():
+                    job = self._pending.get_nowait()
+                    job.future.set_result(_failed_figure(
+                        job.code, f"worker failed to start (exit code {worker.process.exitcode})", "crashed"
+                    ))
+
+    def _collect(self, worker: _Worker) -> None:
+        job = worker.job
+        try:
+            job_id, result = worker.conn.recv()
+        except (EOFError, OSError):
+            worker.process.join(timeout=1)
+            self._replace_crashed(worker)
+            return
+        worker.job = None
+        worker.jobs_done += 1
+        job.future.set_result(result)
+
+        # A worker that ran out of memory may be left in a bad state; retire it with the old ones.
+        if worker.jobs_done >= self.max_jobs_per_worker or result.status == "memory_exceeded":
+            self._retire(worker)
+
+    def _retire(self, worker: _Worker) -> None:
+        try:
+            worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        worker.kill()
+        self._workers.remove(worker)
+
+    def _replace_crashed(self, worker: _Worker) -> None:
+        exitcode = worker.process.exitcode
+        if exitcode is not None and hasattr(signal, "SIGXCPU") and exitcode == -signal.SIGXCPU:
+            self._replace(worker, f"CPU time limit of {self.cpu_time_limit:g}s exceeded", "cpu_time_exceeded")
+        else:
+            self._replace(worker, f"worker crashed (exit code {exitcode})", "crashed")
+
+    def _replace(self, worker: _Worker, reason: str, status: str) -> None:
+        job = worker.job
+        worker.kill()
+        self._workers.remove(worker)
+        job.future.set_result(_failed_figure(job.code, reason, status))
+
+
+_shared_executor: Optional[SnippetExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def get_snippet_executor() -> SnippetExecutor:
+    """
+    Return the process-wide SnippetExecutor, creating it on first use.
+
+    Returns:
+        SnippetExecutor: Shared executor configured from FigureExecutionConfig.
+    """
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = SnippetExecutor()
+            atexit.register(_shared_executor.shutdown)
+        return _shared_executor
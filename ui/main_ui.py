@@ -8,6 +8,7 @@ from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QSize, QPoint
 from PyQt5.QtGui import QFont, QPalette, QColor, QIcon, QPixmap, QPainter
 from PyQt5.QtCore import QLocale
 from PyQt5.QtCore import QLocale, Qt
+from utils.readers import DATASET_FILE_FILTER
 
  
 # Worker thread to prevent UI freezing
@@ -244,7 +245,7 @@ class UI(QMainWindow):
         
         # CSV Path
         csv_layout = QHBoxLayout()
-        csv_label = QLabel("CSV File:")
+        csv_label = QLabel("Dataset File:")
         csv_label.setFont(QFont("Segoe UI", 10))
         self.csv_input = QLineEdit("./data/Employers_data.csv")
         
@@ -259,7 +260,7 @@ class UI(QMainWindow):
         painter.drawRect(2, 4, 6, 2)
         painter.end()
         
-        csv_browse_btn = SquareButton("", "Browse", "Browse for CSV file")
+        csv_browse_btn = SquareButton("", "Browse", "Browse for dataset file (CSV, Parquet, Arrow/Feather)")
         csv_browse_btn.clicked.connect(self.browse_csv)
         
         csv_layout.addWidget(csv_label)
@@ -342,6 +343,11 @@ class UI(QMainWindow):
         self.dark_theme_checkbox = QCheckBox("Use Dark Theme in Report")
         self.dark_theme_checkbox.setFont(QFont("Segoe UI", 10))
         input_layout.addWidget(self.dark_theme_checkbox)
+
+        # Resume Checkbox
+        self.resume_checkbox = QCheckBox("Resume Previous Run (skip completed stages)")
+        self.resume_checkbox.setFont(QFont("Segoe UI", 10))
+        input_layout.addWidget(self.resume_checkbox)
         
         frame_layout.addWidget(input_group)
         
@@ -432,7 +438,7 @@ class UI(QMainWindow):
         
     def browse_csv(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select CSV File", "", "CSV Files (*.csv)"
+            self, "Select Dataset File", "", DATASET_FILE_FILTER
         )
         if file_path:
             self.csv_input.setText(file_path)
@@ -454,12 +460,13 @@ class UI(QMainWindow):
             "output_file": self.output_input.text(),
             "page_title": self.page_title_input.text(),
             "dark_theme": self.dark_theme_checkbox.isChecked(),
+            "resume": self.resume_checkbox.isChecked(),
             "callback_func": self.progress_callback  # Add the callback function
         }
         
         # Validate required fields
         if not conversion_kwargs["csv_path"]:
-            QMessageBox.warning(self, "Warning", "Please select a CSV file.")
+            QMessageBox.warning(self, "Warning", "Please select a dataset file.")
             return
             
         # Disable start button and enable stop button
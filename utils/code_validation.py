@@ -0,0 +1,396 @@
+import ast
+import difflib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set
+
+import pandas as pd
+from litellm import completion
+
+from config import LLMConfig, SnippetValidationConfig
+from core.dataset_registry import dataset_registry
+from utils.rate_limiter import llm_rate_limiter
+
+
+# Keyword arguments of plotly.express functions that name dataset columns.
+PX_COLUMN_KEYWORDS = {
+    "x", "y", "z", "color", "symbol", "size", "text", "facet_row", "facet_col",
+    "hover_name", "line_group", "animation_frame", "animation_group", "names",
+    "values", "parents", "ids", "path", "dimensions", "hover_data", "custom_data",
+    "error_x", "error_y", "line_dash", "pattern_shape", "r", "theta", "a", "b", "c",
+    "lat", "lon", "locations", "base", "x_start", "x_end",
+}
+
+# DataFrame methods whose arguments name existing columns.
+COLUMN_METHODS = {"groupby", "sort_values", "drop_duplicates", "dropna", "pivot_table", "pivot", "melt", "nlargest", "nsmallest", "set_index"}
+COLUMN_METHOD_KEYWORDS = {"by", "subset", "index", "columns", "values", "id_vars", "value_vars"}
+
+FORBIDDEN_MODULES = {"os", "sys", "subprocess", "shutil", "socket", "pathlib", "requests", "urllib", "http", "pickle", "glob", "io", "tempfile", "ctypes", "multiprocessing", "threading"}
+FORBIDDEN_CALLS = {"open", "exec", "eval", "compile", "input", "__import__", "breakpoint", "exit", "quit"}
+FORBIDDEN_METHODS = {"show", "write_image", "write_html", "write_json", "to_csv", "to_excel", "to_parquet", "to_json", "to_pickle", "to_sql", "to_feather", "savefig"}
+DATASET_READERS = {"read_csv", "read_parquet", "read_feather"}
+
+# Attributes whose assignment names columns: `df.columns = [...]`, `series.name = ...`, `df.index.name = ...`.
+NAMING_ATTRIBUTES = {"columns", "name", "names"}
+# Methods whose positional string arguments become column names once the result is reset or framed.
+NAMING_METHODS = {"rename", "rename_axis", "to_frame", "set_names"}
+# Calls producing Plotly figures; subscripts on their results address figure properties, not columns.
+FIGURE_CALLS = {"Figure", "FigureWidget", "make_subplots"}
+# Rows scanned at a time when collecting category values; scanning stops once a column has too many.
+VOCABULARY_CHUNK_ROWS = 65_536
+
+
+@dataclass
+class ValidationResult:
+    """
+    Outcome of statically validating one snippet.
+
+    Attributes:
+        code (str): The snippet.
+        errors (List[str]): Problems found; empty if the snippet is valid.
+    """
+    code: str
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+
+def _string_constants(node: ast.AST) -> List[str]:
+    # A column argument can be a string or a list/tuple of strings.
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [item.value for item in node.elts if isinstance(item, ast.Constant) and isinstance(item.value, str)]
+    return []
+
+
+def _root_name(node: ast.AST) -> Optional[str]:
+    # fig["layout"]["title"] and fig.layout["xaxis"] both lead back to `fig`.
+    while isinstance(node, (ast.Subscript, ast.Attribute)):
+        node = node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _call_name(func: ast.AST) -> Optional[str]:
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    return None
+
+
+class _SnippetVisitor(ast.NodeVisitor):
+    """Collects column references, names created by the snippet and forbidden constructs."""
+
+    def __init__(self):
+        self.referenced: List[str] = []
+        self.created: Set[str] = set()
+        self.errors: List[str] = []
+        self.assigns_fig = False
+        self.read_paths: List[str] = []
+        self.figures: Set[str] = {"fig"}
+
+    def _mark_created(self, node: ast.AST) -> None:
+        self.created.update(_string_constants(node))
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name.split(".")[0] in FORBIDDEN_MODULES:
+                self.errors.append(f"Forbidden import of '{alias.name}'.")
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        if node.module and node.module.split(".")[0] in FORBIDDEN_MODULES:
+            self.errors.append(f"Forbidden import from '{node.module}'.")
+        self.generic_visit(node)
+
+    def _is_figure_call(self, value: Optional[ast.AST]) -> bool:
+        if not isinstance(value, ast.Call):
+            return False
+        owner = _root_name(value.func) if isinstance(value.func, ast.Attribute) else None
+        return owner in {"px", "go"} or _call_name(value.func) in FIGURE_CALLS
+
+    def _check_target(self, target: ast.AST, value: Optional[ast.AST] = None) -> None:
+        if isinstance(target, ast.Name):
+            if target.id == "fig":
+                self.assigns_fig = True
+            elif self._is_figure_call(value) or (isinstance(value, ast.Name) and value.id in self.figures):
+                self.figures.add(target.id)
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for item in target.elts:
+                self._check_target(item)
+        elif isinstance(target, ast.Subscript):
+            # data["new_column"] = ... creates a column; fig["layout"] = ... sets a figure property
+            if _root_name(target.value) not in self.figures:
+                self._mark_created(target.slice)
+        elif isinstance(target, ast.Attribute) and target.attr in NAMING_ATTRIBUTES and value is not None:
+            # counts.columns = ["Gender", "Total"], series.name = "Average"
+            self._mark_created(value)
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            self._check_target(target, node.value)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        self._check_target(node.target, node.value)
+        self.generic_visit(node)
+
+    def visit_AugAssign(self, node):
+        self._check_target(node.target)
+        self.generic_visit(node)
+
+    def visit_Subscript(self, node):
+        if _root_name(node.value) in self.figures:
+            return
+        if isinstance(node.ctx, ast.Load) and not isinstance(node.value, ast.Dict):
+            self.referenced.extend(_string_constants(node.slice))
+        self.generic_visit(node)
+
+    def visit_Dict(self, node):
+        # Dict keys become column names (DataFrame constructors, rename, agg, labels).
+        for key in node.keys:
+            if key is not None:
+                self._mark_created(key)
+        for value in node.values:
+            self._mark_created(value)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        name = _call_name(node.func)
+        owner = node.func.value.id if isinstance(node.func, ast.Attribute) and isinstance(node.func.value, ast.Name) else None
+
+        if isinstance(node.func, ast.Name) and name in FORBIDDEN_CALLS:
+            self.errors.append(f"Forbidden call to '{name}()'.")
+        elif isinstance(node.func, ast.Attribute) and name in FORBIDDEN_METHODS:
+            self.errors.append(f"Forbidden call to '.{name}()' (no display or file output is allowed).")
+        elif isinstance(node.func, ast.Attribute) and name and name.startswith("read_"):
+            if name not in DATASET_READERS:
+                self.errors.append(f"Forbidden call to '.{name}()': only the provided dataset may be read.")
+            elif node.args:
+                self.read_paths.extend(_string_constants(node.args[0]))
+
+        for keyword in node.keywords:
+            if keyword.arg is None:
+                continue
+            if owner == "px" and keyword.arg in PX_COLUMN_KEYWORDS:
+                self.referenced.extend(_string_constants(keyword.value))
+            elif name in COLUMN_METHODS and keyword.arg in COLUMN_METHOD_KEYWORDS:
+                self.referenced.extend(_string_constants(keyword.value))
+            elif keyword.arg in {"name", "value_name", "var_name", "names", "columns"}:
+                # reset_index(name=...), melt(value_name=...), DataFrame(columns=[...])
+                self._mark_created(keyword.value)
+            elif name in {"agg", "aggregate", "assign", "rename"}:
+                self.created.add(keyword.arg)
+            elif name == "dict":
+                # Like a dict literal: rename(columns=dict(a="Age"))
+                self.created.add(keyword.arg)
+                self._mark_created(keyword.value)
+
+        if name in COLUMN_METHODS and node.args:
+            self.referenced.extend(_string_constants(node.args[0]))
+        elif name in NAMING_METHODS and node.args:
+            # value_counts().rename("Total"), to_frame("Age"), rename_axis("Gender")
+            self._mark_created(node.args[0])
+        self.generic_visit(node)
+
+
+def validate_snippet(
+    code: str,
+    columns: Iterable[str],
+    known_names: Iterable[str] = (),
+    dataset_path: Optional[str] = None,
+) -> ValidationResult:
+    """
+    Statically check a generated Plotly snippet before it is executed.
+
+    The snippet must parse, assign a `fig` variable, avoid `show()`, file output,
+    system modules and dynamic code execution, read no file other than the dataset,
+    and only reference columns that exist. Names the snippet creates itself (new
+    columns, `reset_index(name=...)`, `rename(...)`, `.columns = [...]`, `.name = ...`,
+    dict keys) and `known_names` (e.g. category values that become columns after a
+    pivot) are accepted as column references too. Subscripts on figures (`fig["layout"]`)
+    address figure properties and are not checked.
+
+    Args:
+        code (str): Snippet to check.
+        columns (Iterable[str]): Columns of the dataset.
+        known_names (Iterable[str], optional): Other names allowed as column references.
+        dataset_path (str, optional): Path of the dataset; literal read paths must point to it.
+
+    Returns:
+        ValidationResult: The snippet and the list of problems found.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return ValidationResult(code=code, errors=[f"Syntax error at line {e.lineno}: {e.msg}."])
+
+    visitor = _SnippetVisitor()
+    visitor.visit(tree)
+    errors = list(visitor.errors)
+
+    if not visitor.assigns_fig:
+        errors.append("The snippet never assigns the figure to a variable named 'fig'.")
+
+    columns = [str(col) for col in columns]
+    allowed = set(columns) | set(map(str, known_names)) | visitor.created | {"index", "count", "size", "value", "variable", "proportion"}
+    unknown = [name for name in dict.fromkeys(visitor.referenced) if name not in allowed]
+    for name in unknown:
+        close = difflib.get_close_matches(name, columns, n=1)
+        hint = f" Did you mean '{close[0]}'?" if close else ""
+        errors.append(f"Unknown column '{name}'.{hint}")
+
+    if dataset_path is not None:
+        for path in visitor.read_paths:
+            if not dataset_registry.is_registered_path(path, dataset_path) and os.path.basename(path) != os.path.basename(dataset_path):
+                errors.append(f"Reads '{path}', which is not the provided dataset.")
+
+    return ValidationResult(code=code, errors=errors)
+
+
+def dataset_vocabulary(csv_path: str, max_values: int = None) -> tuple:
+    """
+    Collect the column names and low-cardinality category values of a dataset.
+
+    Uses the registry frame that `create_dataframe_info` profiles, so the names match
+    the `DataFrameInfo` the code agents were given.
+
+    Args:
+        csv_path (str): Path to the dataset.
+        max_values (int, optional): Largest cardinality whose values are collected.
+            Defaults to SnippetValidationConfig.max_category_values.
+
+    Returns:
+        tuple: (column names, category values usable as derived column names).
+    """
+    max_values = max_values or SnippetValidationConfig.max_category_values
+    df = dataset_registry.get_frame(csv_path)
+    # Streamed datasets carry exact distinct counts; columns over the limit are skipped unscanned.
+    profile = dataset_registry.get_profile(csv_path)
+    num_unique = {info.name: info.num_unique for info in profile[1]} if profile is not None else {}
+    known = set()
+    for position, col in enumerate(df.columns):
+        column = df.iloc[:, position]
+        if column.dtype == object or str(column.dtype) in {"category", "bool", "boolean"}:
+            if num_unique.get(str(col), 0) > max_values:
+                continue
+            values = _bounded_distinct(column, max_values)
+            if values is not None:
+                known.update(str(value) for value in values)
+    return [str(col) for col in df.columns], known
+
+
+def _bounded_distinct(column: pd.Series, max_values: int) -> Optional[list]:
+    # Distinct non-null values, or None as soon as there are more than max_values of them:
+    # high-cardinality text and ID columns stop after their first chunk instead of a full unique().
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = column.cat.categories
+        return list(categories) if len(categories) <= max_values else None
+    seen = set()
+    for start in range(0, len(column), VOCABULARY_CHUNK_ROWS):
+        try:
+            seen.update(column.iloc[start:start + VOCABULARY_CHUNK_ROWS].dropna().unique())
+        except TypeError:
+            return None  # unhashable cells (lists, dicts) cannot be column names anyway
+        if len(seen) > max_values:
+            return None
+    return list(seen)
+
+
+def _regeneration_prompt(invalid: List[ValidationResult], columns: List[str]) -> str:
+    snippets = [{"id": i, "code": result.code, "errors": result.errors} for i, result in enumerate(invalid)]
+    return (
+        "The following Python Plotly snippets failed static validation. Fix each one.\n"
+        f"The dataset is available as the pandas DataFrame `data` with columns: {json.dumps(columns)}.\n"
+        "Rules: assign the final Plotly figure to a variable named 'fig'; do not call fig.show(); "
+        "do not read or write files other than the dataset; do not import os, sys or subprocess; "
+        "only use existing columns.\n"
+        "Answer with a JSON array only, one object per snippet: "
+        '[{"id": <id>, "code": "<fixed code>"}].\n\n'
+        f"{json.dumps(snippets)}"
+    )
+
+
+def _parse_regenerated(text: str, count: int) -> List[Optional[str]]:
+    match = re.search(r"\[.*\]", text or "", re.DOTALL)
+    fixed: List[Optional[str]] = [None] * count
+    if not match:
+        return fixed
+    try:
+        items = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return fixed
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("id"), int) and 0 <= item["id"] < count and isinstance(item.get("code"), str):
+            fixed[item["id"]] = item["code"]
+    return fixed
+
+
+def regenerate_snippets(invalid: List[ValidationResult], columns: List[str]) -> List[Optional[str]]:
+    """
+    Ask the code model to fix a batch of invalid snippets in a single request.
+
+    Args:
+        invalid (List[ValidationResult]): Snippets that failed validation, with their errors.
+        columns (List[str]): Columns of the dataset.
+
+    Returns:
+        List[Optional[str]]: One fixed snippet per input, or None where no fix came back.
+    """
+    prompt = _regeneration_prompt(invalid, columns)
+    try:
+        llm_rate_limiter.acquire_sync(len(prompt) // 4 + sum(len(result.code) // 4 for result in invalid))
+        response = completion(
+            model=LLMConfig.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            api_key=LLMConfig.api_key,
+        )
+        return _parse_regenerated(response["choices"][0]["message"]["content"], len(invalid))
+    except Exception as e:
+        print(f"Snippet regeneration failed: {e}")
+        return [None] * len(invalid)
+
+
+def validate_snippets(codes: List[str], csv_path: str) -> List[str]:
+    """
+    Validate generated snippets and keep only the ones that are safe to execute.
+
+    Invalid snippets are sent back to the code model in one batched request per
+    round (up to SnippetValidationConfig.max_regeneration_rounds); fixes that pass
+    validation take the original snippet's place, and whatever is still invalid is
+    dropped, so no execution, render or insight cost is spent on it.
+
+    Args:
+        codes (List[str]): Generated snippets.
+        csv_path (str): Path to the dataset the snippets run against.
+
+    Returns:
+        List[str]: Valid snippets, in their original order.
+    """
+    if not SnippetValidationConfig.enabled:
+        return codes
+
+    columns, known_names = dataset_vocabulary(csv_path)
+    results = [validate_snippet(code, columns, known_names, csv_path) for code in codes]
+
+    rounds = SnippetValidationConfig.max_regeneration_rounds if SnippetValidationConfig.regenerate else 0
+    for _ in range(rounds):
+        invalid_positions = [i for i, result in enumerate(results) if not result.is_valid]
+        if not invalid_positions:
+            break
+        fixes = regenerate_snippets([results[i] for i in invalid_positions], columns)
+        for position, fixed in zip(invalid_positions, fixes):
+            if fixed is not None:
+                results[position] = validate_snippet(fixed, columns, known_names, csv_path)
+
+    rejected = [result for result in results if not result.is_valid]
+    for result in rejected:
+        print(f"Rejected snippet: {'; '.join(result.errors)}")
+    print(f"Snippet validation: {len(results) - len(rejected)} of {len(results)} snippets passed.")
+
+    return [result.code for result in results if result.is_valid]
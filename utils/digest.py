@@ -0,0 +1,158 @@
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from schemas.schemas import DatasetDigest
+from config import DigestConfig
+from utils.profiling import to_python
+
+
+def estimate_tokens(payload: Any) -> int:
+    """
+    Roughly estimate the LLM tokens of a JSON-serializable payload (~4 characters per token).
+
+    Args:
+        payload (Any): JSON-serializable value or pydantic model.
+
+    Returns:
+        int: Estimated token count.
+    """
+    if hasattr(payload, "model_dump_json"):
+        text = payload.model_dump_json()
+    else:
+        text = json.dumps(payload, default=str)
+    return len(text) // 4 + 1
+
+
+def _histograms(numeric: pd.DataFrame, bins: int) -> Dict[str, Dict[str, List[Any]]]:
+    histograms = {}
+    for col in numeric.columns:
+        values = numeric[col].dropna().to_numpy(dtype=float)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            continue
+        counts, edges = np.histogram(values, bins=bins)
+        histograms[str(col)] = {
+            "bin_edges": [round(float(edge), 6) for edge in edges],
+            "counts": [int(count) for count in counts],
+        }
+    return histograms
+
+
+def _top_categories(categorical: pd.DataFrame, top_k: int) -> Dict[str, List[Dict[str, Any]]]:
+    return {
+        str(col): [
+            {"value": to_python(value), "count": int(count)}
+            for value, count in categorical[col].value_counts(dropna=True).head(top_k).items()
+        ]
+        for col in categorical.columns
+    }
+
+
+def _correlations(numeric: pd.DataFrame, max_pairs: int, max_columns: int) -> List[Dict[str, Any]]:
+    if numeric.shape[1] < 2 or max_pairs <= 0:
+        return []
+    if numeric.shape[1] > max_columns:
+        numeric = numeric[numeric.var().sort_values(ascending=False).index[:max_columns]]
+
+    corr = numeric.corr()
+    columns = list(corr.columns)
+    pairs = []
+    for i in range(len(columns)):
+        for j in range(i + 1, len(columns)):
+            r = corr.iat[i, j]
+            if pd.notna(r):
+                pairs.append({"a": str(columns[i]), "b": str(columns[j]), "r": round(float(r), 3)})
+    pairs.sort(key=lambda pair: abs(pair["r"]), reverse=True)
+    return pairs[:max_pairs]
+
+
+def _stratify_column(df: pd.DataFrame, max_strata: int) -> Optional[Any]:
+    best, best_unique = None, None
+    for col in df.columns:
+        if pd.api.types.is_float_dtype(df[col].dtype):
+            continue
+        num_unique = df[col].nunique(dropna=True)
+        if 2 <= num_unique <= max_strata and (best_unique is None or num_unique < best_unique):
+            best, best_unique = col, num_unique
+    return best
+
+
+def _stratified_sample(df: pd.DataFrame, n: int, stratify_by: Optional[Any], seed: int) -> List[Dict[str, Any]]:
+    if n <= 0 or df.empty:
+        return []
+    rng = np.random.default_rng(seed)
+    n = min(n, len(df))
+
+    if stratify_by is None:
+        positions = np.sort(rng.choice(len(df), size=n, replace=False))
+    else:
+        positions = []
+        for group_positions in df.groupby(stratify_by, dropna=False, sort=False).indices.values():
+            share = max(1, round(n * len(group_positions) / len(df)))
+            positions.extend(rng.choice(group_positions, size=min(share, len(group_positions)), replace=False))
+        positions = np.sort(np.asarray(positions))[:max(n, 1)]
+
+    rows = df.iloc[positions]
+    return [
+        {str(col): to_python(value) for col, value in row.items()}
+        for row in rows.to_dict(orient="records")
+    ]
+
+
+def build_dataset_digest(df: pd.DataFrame, token_budget: int = None, num_rows: int = None) -> DatasetDigest:
+    """
+    Build a compact, token-budgeted digest of a dataset for the LLM stages.
+
+    The digest holds per-column histograms (numeric), top-k categories (non-numeric),
+    the strongest pairwise correlations and a small sample stratified on the
+    lowest-cardinality categorical column. Its size depends on the number of columns
+    and the configured limits, never on the number of rows. If it exceeds the token
+    budget, the sample, the correlations, the top-k lists and the histogram resolution
+    are reduced in turn until it fits.
+
+    Args:
+        df (pd.DataFrame): Dataset to summarize.
+        token_budget (int, optional): Maximum estimated tokens. Defaults to DigestConfig.token_budget.
+        num_rows (int, optional): Row count of the full dataset when `df` is a sample.
+            Defaults to `len(df)`.
+
+    Returns:
+        DatasetDigest: The digest, with its own token estimate.
+    """
+    token_budget = token_budget or DigestConfig.token_budget
+    numeric = df.select_dtypes(include="number").select_dtypes(exclude="bool")
+    categorical = df.drop(columns=numeric.columns)
+
+    sample_rows = DigestConfig.sample_rows
+    max_correlations = DigestConfig.max_correlations
+    top_k = DigestConfig.top_k
+    bins = DigestConfig.histogram_bins
+    stratify_by = _stratify_column(categorical, DigestConfig.max_strata)
+
+    while True:
+        digest = DatasetDigest(
+            num_rows=int(df.shape[0] if num_rows is None else num_rows),
+            histograms=_histograms(numeric, bins),
+            top_categories=_top_categories(categorical, top_k),
+            correlations=_correlations(numeric, max_correlations, DigestConfig.max_correlation_columns),
+            stratified_by=str(stratify_by) if stratify_by is not None else None,
+            sample_rows=_stratified_sample(df, sample_rows, stratify_by, DigestConfig.seed),
+        )
+        digest.token_estimate = estimate_tokens(digest)
+        if digest.token_estimate <= token_budget:
+            return digest
+
+        if sample_rows > 1:
+            sample_rows //= 2
+        elif max_correlations > 0:
+            max_correlations //= 2
+        elif top_k > 1:
+            top_k //= 2
+        elif bins > 3:
+            bins = max(3, bins // 2)
+        else:
+            # Nothing left to shrink: the column count alone exceeds the budget.
+            return digest
@@ -0,0 +1,140 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+
+class DiskCache:
+    """
+    Content-addressed, size-capped JSON cache on disk with LRU eviction.
+
+    Each entry is one JSON file named after its key, sharded by the key's first two
+    characters. A hit refreshes the file's modification time, and when the total size
+    exceeds `max_bytes` the least recently used files are deleted first. Hit and miss
+    counters are kept per instance.
+
+    Attributes:
+        directory (str): Root directory of the cache.
+        max_bytes (int): Size cap of all entries together.
+        hits (int): Number of successful lookups.
+        misses (int): Number of failed lookups.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialize the cache. The directory is created and scanned lazily on first write.
+
+        Args:
+            directory (str): Root directory of the cache.
+            max_bytes (int): Size cap of all entries together.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Hash the given parts into a cache key.
+
+        Args:
+            *parts: bytes or str values (anything else is converted with `str`).
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+            digest.update(len(data).to_bytes(8, "big"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Any: The stored JSON value, or None on a miss.
+        """
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a JSON-serializable value, evicting old entries if over the size cap.
+
+        Args:
+            key (str): Cache key.
+            value (Any): JSON-serializable value.
+        """
+        path = self._path(key)
+        payload = json.dumps(value).encode("utf-8")
+        with self._lock:
+            if self._size is None:
+                self._size = sum(os.path.getsize(p) for p in self._entry_paths())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            self._size += len(payload) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss counters and the current size.
+
+        Returns:
+            Dict[str, int]: `hits`, `misses` and `bytes`.
+        """
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._size or 0}
+
+    # ---------- Internal helpers ----------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entry_paths(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
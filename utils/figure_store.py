@@ -0,0 +1,57 @@
+from typing import Optional
+
+from config import CacheConfig
+from core.dataset_registry import dataset_registry
+from utils.disk_cache import DiskCache
+from utils.snippet_dedupe import snippet_fingerprint
+
+
+figure_cache = DiskCache(CacheConfig.figure_store_dir, CacheConfig.figure_store_max_bytes)
+
+
+def figure_key(code: str, csv_path: str) -> str:
+    """
+    Build the store key of a figure: the snippet's canonical fingerprint and the dataset content hash.
+
+    The fingerprint ignores formatting, variable names and presentation-only arguments
+    (see `snippet_fingerprint`), so a snippet the insights crew hands back reformatted
+    still finds the figure executed for it instead of being executed again.
+
+    Args:
+        code (str): Plotly snippet that produced the figure.
+        csv_path (str): Dataset the snippet ran against.
+
+    Returns:
+        str: Cache key.
+    """
+    return DiskCache.make_key(dataset_registry.fingerprint(csv_path), snippet_fingerprint(code))
+
+
+def store_figure(code: str, csv_path: str, figure_json: str) -> None:
+    """
+    Keep the figure produced by a snippet so the report can reuse it instead of re-executing.
+
+    Args:
+        code (str): Plotly snippet that produced the figure.
+        csv_path (str): Dataset the snippet ran against.
+        figure_json (str): The figure serialized with `fig.to_json()`.
+    """
+    figure_cache.set(figure_key(code, csv_path), {"figure_json": figure_json})
+
+
+def load_figure(code: str, csv_path: str) -> Optional[str]:
+    """
+    Fetch the figure a snippet produced during the insight stage.
+
+    Args:
+        code (str): Plotly snippet.
+        csv_path (str): Dataset the snippet ran against.
+
+    Returns:
+        Optional[str]: The figure JSON, or None if the snippet was never executed.
+    """
+    try:
+        entry = figure_cache.get(figure_key(code, csv_path))
+    except OSError:
+        return None
+    return entry["figure_json"] if entry else None
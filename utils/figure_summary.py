@@ -0,0 +1,223 @@
+import base64
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Trace types whose content survives a numeric summary; anything else needs the rendered image.
+SUMMARIZABLE_TRACE_TYPES = {"bar", "histogram", "box", "line"}
+
+# Upper bounds that keep a summary to a few hundred tokens whatever the data size.
+MAX_CATEGORIES = 10
+MAX_LINE_POINTS = 12
+HISTOGRAM_BINS = 10
+MAX_TRACES = 8
+
+
+def _array(value: Any) -> Optional[np.ndarray]:
+    # Plotly >= 6 serializes numeric arrays as {"dtype", "bdata"[, "shape"]}.
+    if value is None:
+        return None
+    if isinstance(value, dict) and "bdata" in value:
+        array = np.frombuffer(base64.b64decode(value["bdata"]), dtype=np.dtype(value["dtype"]))
+        if value.get("shape"):
+            array = array.reshape([int(size) for size in str(value["shape"]).split(",")])
+        return array
+    return np.asarray(value, dtype=object if any(isinstance(item, str) for item in value) else None)
+
+
+def _number(value: Any) -> Any:
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if not np.isfinite(value) else round(float(value), 4)
+    return value if isinstance(value, (str, bool)) or value is None else str(value)
+
+
+def _is_numeric(array: np.ndarray) -> bool:
+    return pd.api.types.is_numeric_dtype(pd.Series(array).infer_objects())
+
+
+def _title(layout: Dict[str, Any], key: str) -> Optional[str]:
+    title = layout.get(key, {}).get("title") if key != "title" else layout.get("title")
+    if isinstance(title, dict):
+        title = title.get("text")
+    return title or None
+
+
+def _trace_type(trace: Dict[str, Any]) -> str:
+    trace_type = trace.get("type", "scatter")
+    if trace_type in ("scatter", "scattergl") and "lines" in (trace.get("mode") or "lines"):
+        return "line"
+    return trace_type
+
+
+def _numeric_stats(values: np.ndarray) -> Dict[str, Any]:
+    values = pd.to_numeric(pd.Series(values), errors="coerce").dropna().to_numpy(dtype=np.float64)
+    if values.size == 0:
+        return {"count": 0}
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    outliers = int(np.count_nonzero((values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)))
+    return {
+        "count": int(values.size), "mean": _number(values.mean()), "std": _number(values.std()),
+        "min": _number(values.min()), "q1": _number(q1), "median": _number(median), "q3": _number(q3),
+        "max": _number(values.max()), "outliers": outliers,
+    }
+
+
+def _categories(labels: np.ndarray, values: np.ndarray, how: str) -> Dict[str, Any]:
+    # Bars with repeated labels stack, so their values add up per category.
+    series = pd.Series(values).groupby(pd.Series(labels).astype(str), sort=False)
+    aggregated = {"sum": series.sum, "count": series.count, "avg": series.mean, "mean": series.mean,
+                  "min": series.min, "max": series.max}.get(how, series.sum)()
+    aggregated = aggregated.sort_values(ascending=False)
+    summary = {
+        "categories": int(aggregated.size),
+        "total": _number(aggregated.sum()),
+        "top": {label: _number(value) for label, value in aggregated.head(MAX_CATEGORIES).items()},
+    }
+    if aggregated.size > MAX_CATEGORIES:
+        summary["bottom"] = {label: _number(value) for label, value in aggregated.tail(3).items()}
+    return summary
+
+
+def _line_summary(x: Optional[np.ndarray], y: np.ndarray) -> Dict[str, Any]:
+    y = pd.to_numeric(pd.Series(y), errors="coerce").to_numpy(dtype=np.float64)
+    x = np.arange(y.size) if x is None else x
+    valid = np.isfinite(y)
+    x, y = x[valid], y[valid]
+    if y.size == 0:
+        return {"points": 0}
+
+    # The trend is fitted against numeric x where possible, otherwise against the point order.
+    position = pd.to_numeric(pd.Series(x), errors="coerce").to_numpy(dtype=np.float64)
+    if not np.all(np.isfinite(position)):
+        position = np.arange(y.size, dtype=np.float64)
+    slope = np.polyfit(position, y, 1)[0] if y.size > 1 and np.ptp(position) > 0 else 0.0
+    correlation = np.corrcoef(position, y)[0, 1] if y.size > 2 and np.ptp(y) > 0 and np.ptp(position) > 0 else None
+
+    picks = np.unique(np.linspace(0, y.size - 1, min(MAX_LINE_POINTS, y.size)).round().astype(int))
+    return {
+        "points": int(y.size),
+        "first": [_number(x[0]), _number(y[0])],
+        "last": [_number(x[-1]), _number(y[-1])],
+        "change_pct": _number(100 * (y[-1] - y[0]) / abs(y[0])) if y[0] else None,
+        "min": [_number(x[y.argmin()]), _number(y.min())],
+        "max": [_number(x[y.argmax()]), _number(y.max())],
+        "mean": _number(y.mean()),
+        "slope": _number(slope),
+        "trend_r": _number(correlation) if correlation is not None else None,
+        "sampled_points": [[_number(x[i]), _number(y[i])] for i in picks],
+    }
+
+
+def _histogram_summary(trace: Dict[str, Any], x: Optional[np.ndarray], y: Optional[np.ndarray]) -> Dict[str, Any]:
+    horizontal = trace.get("orientation") == "h" or (x is None and y is not None)
+    data, weights = (y, x) if horizontal else (x, y)
+    if data is None:
+        return {}
+    if weights is not None or not _is_numeric(data):
+        values = weights if weights is not None else np.ones(len(data))
+        return _categories(data, values, trace.get("histfunc", "sum" if weights is not None else "count"))
+
+    values = pd.to_numeric(pd.Series(data), errors="coerce").dropna().to_numpy(dtype=np.float64)
+    summary = _numeric_stats(values)
+    if values.size:
+        counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+        summary["bins"] = [[_number(edges[i]), _number(edges[i + 1]), int(counts[i])] for i in range(counts.size)]
+    return summary
+
+
+def _box_summary(trace: Dict[str, Any], x: Optional[np.ndarray], y: Optional[np.ndarray]) -> Dict[str, Any]:
+    horizontal = trace.get("orientation") == "h"
+    values, groups = (x, y) if horizontal else (y, x)
+    if values is None:
+        return {}
+    if groups is None:
+        return _numeric_stats(values)
+    frame = pd.DataFrame({"group": pd.Series(groups).astype(str), "value": values})
+    grouped = list(frame.groupby("group", sort=False)["value"])[:MAX_CATEGORIES]
+    return {"groups": {group: _numeric_stats(series.to_numpy()) for group, series in grouped}}
+
+
+def _trace_summary(trace: Dict[str, Any]) -> Dict[str, Any]:
+    trace_type = _trace_type(trace)
+    x, y = _array(trace.get("x")), _array(trace.get("y"))
+    summary: Dict[str, Any] = {"type": trace_type}
+    if trace.get("name"):
+        summary["name"] = trace["name"]
+
+    if trace_type == "bar":
+        labels, values = (y, x) if trace.get("orientation") == "h" else (x, y)
+        if values is None:
+            return summary
+        labels = np.arange(len(values)) if labels is None else labels
+        summary.update(_categories(labels, pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(), "sum"))
+    elif trace_type == "line":
+        if y is not None:
+            summary.update(_line_summary(x, y))
+    elif trace_type == "histogram":
+        summary.update(_histogram_summary(trace, x, y))
+    elif trace_type == "box":
+        summary.update(_box_summary(trace, x, y))
+    return summary
+
+
+def summarize_figure(figure_json: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract a compact numeric summary from a serialized Plotly figure.
+
+    Only bar, line, histogram and box charts are summarized. For these, the traces
+    already hold everything the chart shows: axis titles, category totals (largest
+    first), line trends and distribution statistics.
+
+    Args:
+        figure_json (str): Figure serialized with `fig.to_json()`.
+
+    Returns:
+        Optional[Dict[str, Any]]: JSON-serializable summary, or None if the figure has
+            no traces or any trace is of another type (scatter plots, maps, heatmaps,
+            pies, ...) and needs the rendered image instead.
+    """
+    try:
+        figure = json.loads(figure_json)
+    except (TypeError, ValueError):
+        return None
+    traces = figure.get("data") or []
+    if not traces or any(_trace_type(trace) not in SUMMARIZABLE_TRACE_TYPES for trace in traces):
+        return None
+
+    layout = figure.get("layout") or {}
+    summary: Dict[str, Any] = {
+        "title": _title(layout, "title"),
+        "x_axis": _title(layout, "xaxis"),
+        "y_axis": _title(layout, "yaxis"),
+        "traces": [],
+    }
+    try:
+        for trace in traces[:MAX_TRACES]:
+            summary["traces"].append(_trace_summary(trace))
+    except (TypeError, ValueError):
+        return None
+    if len(traces) > MAX_TRACES:
+        summary["omitted_traces"] = len(traces) - MAX_TRACES
+    return summary
+
+
+def figure_summary_text(figure_json: str) -> Optional[str]:
+    """
+    Serialize the summary of a figure for a text-only insight request.
+
+    Args:
+        figure_json (str): Figure serialized with `fig.to_json()`.
+
+    Returns:
+        Optional[str]: Compact JSON, or None if the figure cannot be summarized.
+    """
+    summary = summarize_figure(figure_json)
+    if summary is None:
+        return None
+    return json.dumps(summary, separators=(",", ":"), default=str)
@@ -0,0 +1,153 @@
+import base64
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from config import InsightsLLMConfig
+
+
+UPLOAD_MIME_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg", "png": "image/png"}
+
+# Smallest longest side the byte budget may shrink an image to; below this, charts become unreadable.
+_MIN_SIDE = 256
+
+# Data URLs by (PNG digest, upload signature), least recently used first.
+_upload_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_upload_cache_bytes = 0
+_upload_cache_lock = threading.Lock()
+
+_missing_pillow_reported = False
+
+
+def _report_missing_pillow() -> None:
+    # Printed once per process; every chart falls back the same way.
+    global _missing_pillow_reported
+    if not _missing_pillow_reported:
+        _missing_pillow_reported = True
+        print("Pillow is not installed; charts are uploaded as the original PNG, "
+              "without compact re-encoding (pip install Pillow).")
+
+
+def upload_signature() -> str:
+    """
+    Describe the current upload encoding settings.
+
+    Part of the insights cache key, so insights generated from differently encoded
+    uploads are not mixed up.
+
+    Returns:
+        str: Settings string.
+    """
+    config = InsightsLLMConfig
+    return (
+        f"{config.upload_format}:{config.upload_max_side}:{config.upload_quality}:"
+        f"{config.upload_min_quality}:{config.upload_palette_colors}:{config.upload_max_bytes}"
+    )
+
+
+def _save(image, file_format: str, quality: int, colors: int) -> bytes:
+    buffer = io.BytesIO()
+    if file_format == "png":
+        image.quantize(colors=colors).save(buffer, format="PNG", optimize=True)
+    elif file_format == "jpeg":
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    else:
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def encode_for_upload(png_bytes: bytes) -> Tuple[bytes, str]:
+    """
+    Re-encode a rendered PNG chart into a compact image for an insight request.
+
+    The image is flattened onto white, downscaled so its longest side is at most
+    `upload_max_side`, and saved as WebP, JPEG or a palette PNG. While the result is
+    over `upload_max_bytes`, lossy formats first drop quality down to
+    `upload_min_quality`, then the image is shrunk further (never below 256 pixels).
+
+    Without Pillow (reported once), with `upload_format = "original"`, or if the bytes
+    are not a readable image, the PNG is returned unchanged.
+
+    Args:
+        png_bytes (bytes): Rendered PNG.
+
+    Returns:
+        Tuple[bytes, str]: Encoded image and its MIME type.
+    """
+    config = InsightsLLMConfig
+    file_format = config.upload_format.lower()
+    if file_format not in UPLOAD_MIME_TYPES or file_format == "original":
+        return png_bytes, "image/png"
+
+    try:
+        from PIL import Image
+    except ImportError:
+        _report_missing_pillow()
+        return png_bytes, "image/png"
+
+    try:
+        with Image.open(io.BytesIO(png_bytes)) as source:
+            source = source.convert("RGBA")
+            image = Image.new("RGB", source.size, "white")
+            image.paste(source, mask=source.getchannel("A"))
+    except Exception:
+        return png_bytes, "image/png"
+
+    side = min(max(image.size), config.upload_max_side)
+    quality = config.upload_quality
+    while True:
+        scale = side / max(image.size)
+        resized = image if scale >= 1 else image.resize(
+            (max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS
+        )
+        encoded = _save(resized, file_format, quality, config.upload_palette_colors)
+        if len(encoded) <= config.upload_max_bytes:
+            break
+        if file_format != "png" and quality > config.upload_min_quality:
+            quality = max(config.upload_min_quality, quality - 15)
+        elif side > _MIN_SIDE:
+            side = max(_MIN_SIDE, int(side * 0.75))
+        else:
+            break
+
+    if len(encoded) >= len(png_bytes):
+        return png_bytes, "image/png"
+    return encoded, UPLOAD_MIME_TYPES[file_format]
+
+
+def upload_image_url(img_base64: str) -> str:
+    """
+    Build the data URL sent to the LLM for a base64-encoded PNG chart.
+
+    Results are memoized by a digest of the PNG and the current `upload_signature()`,
+    so a figure retried or re-sent after a failed batch is encoded once, and changing
+    the upload settings never returns a stale encoding. The memo holds at most
+    `InsightsLLMConfig.upload_cache_max_bytes` of data URLs.
+
+    Args:
+        img_base64 (str): Base64-encoded PNG, as stored on the figure.
+
+    Returns:
+        str: `data:<mime>;base64,...` URL of the compact upload image.
+    """
+    global _upload_cache_bytes
+    key = (hashlib.sha256(img_base64.encode("utf-8")).hexdigest(), upload_signature())
+    with _upload_cache_lock:
+        url = _upload_cache.get(key)
+        if url is not None:
+            _upload_cache.move_to_end(key)
+            return url
+
+    encoded, mime_type = encode_for_upload(base64.b64decode(img_base64))
+    url = f"data:{mime_type};base64,{base64.b64encode(encoded).decode('utf-8')}"
+
+    with _upload_cache_lock:
+        if key not in _upload_cache and len(url) <= InsightsLLMConfig.upload_cache_max_bytes:
+            _upload_cache[key] = url
+            _upload_cache_bytes += len(url)
+            while _upload_cache_bytes > InsightsLLMConfig.upload_cache_max_bytes:
+                _, evicted = _upload_cache.popitem(last=False)
+                _upload_cache_bytes -= len(evicted)
+    return url
@@ -0,0 +1,357 @@
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from schemas.schemas import ColumnInfo, DataFrameSummary
+from config import CacheConfig, IngestionConfig, ProfilingConfig
+from utils.profiling import SketchProfiler, to_python, use_approximate_profiling
+from utils.readers import read_arrow_mmap, write_columnar_copy
+
+
+def is_out_of_core(file_path: str, threshold_bytes: int = None) -> bool:
+    """
+    Check whether a dataset file is too large to be loaded in full.
+
+    Args:
+        file_path (str): Path to the dataset file.
+        threshold_bytes (int, optional): Size limit. Defaults to IngestionConfig.out_of_core_threshold_bytes.
+
+    Returns:
+        bool: True if the file is larger than the threshold.
+    """
+    threshold_bytes = IngestionConfig.out_of_core_threshold_bytes if threshold_bytes is None else threshold_bytes
+    return os.path.getsize(file_path) > threshold_bytes
+
+
+def infer_csv_dtypes(file_path: str, sample_rows: int = None) -> Dict[str, str]:
+    """
+    Infer column dtypes from the first rows of a CSV file.
+
+    Only numeric and boolean columns are pinned; text columns are left to the parser.
+    Pinning keeps every chunk of a streamed read on the same dtypes and spares pandas
+    the per-chunk type inference.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        sample_rows (int, optional): Rows to inspect. Defaults to IngestionConfig.dtype_sample_rows.
+
+    Returns:
+        Dict[str, str]: Column name -> dtype, suitable for `pd.read_csv(dtype=...)`.
+    """
+    sample_rows = sample_rows or IngestionConfig.dtype_sample_rows
+    sample = pd.read_csv(file_path, nrows=sample_rows)
+    dtypes = {}
+    for col, dtype in sample.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            dtypes[col] = "boolean"
+        elif pd.api.types.is_integer_dtype(dtype):
+            # Missing values further down the file would break a plain int64.
+            dtypes[col] = "Int64"
+        elif pd.api.types.is_float_dtype(dtype):
+            dtypes[col] = "float64"
+    return dtypes
+
+
+def iter_csv_chunks(file_path: str, chunk_size: int = None, dtypes: Dict[str, str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV file in chunks using dtypes inferred on a sample.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        chunk_size (int, optional): Rows per chunk. Defaults to IngestionConfig.chunk_size.
+        dtypes (Dict[str, str], optional): Dtype hints. Defaults to `infer_csv_dtypes(file_path)`.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the file.
+
+    Raises:
+        ValueError: If a chunk contradicts the dtype hints (e.g. text in a column that looked numeric).
+    """
+    chunk_size = chunk_size or IngestionConfig.chunk_size
+    dtypes = infer_csv_dtypes(file_path) if dtypes is None else dtypes
+
+    with pd.read_csv(file_path, chunksize=chunk_size, dtype=dtypes or None) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+class _ReservoirSampler:
+    """Uniform random sample of a fixed number of rows over a stream of chunks."""
+
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+        self._sample: Optional[pd.DataFrame] = None
+        self._keys = np.empty(0)
+        self._offset = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        # Keeping the rows with the smallest random keys is a uniform sample without replacement.
+        chunk = chunk.set_axis(np.arange(self._offset, self._offset + len(chunk)))
+        self._offset += len(chunk)
+        keys = self._rng.random(len(chunk))
+
+        if self._sample is None:
+            frame, all_keys = chunk, keys
+        else:
+            frame, all_keys = pd.concat([self._sample, chunk]), np.concatenate([self._keys, keys])
+        if len(frame) > self.size:
+            keep = np.argpartition(all_keys, self.size - 1)[:self.size]
+            frame, all_keys = frame.iloc[keep], all_keys[keep]
+        self._sample, self._keys = frame, all_keys
+
+    def result(self) -> pd.DataFrame:
+        if self._sample is None:
+            return pd.DataFrame()
+        return self._sample.sort_index().reset_index(drop=True)
+
+
+class StreamingProfiler:
+    """
+    Column statistics accumulated chunk by chunk.
+
+    Row and missing counts and numeric min/max are exact. Value counts are merged
+    across chunks; once a column has more than `max_tracked_values` distinct values
+    only the most frequent ones are kept, so its `num_unique` becomes a lower bound.
+    Quantiles are taken from the reservoir sample passed to `finalize`.
+    """
+
+    def __init__(self, num_samples: int = 3, top_k: int = None, max_tracked_values: int = None):
+        self.num_samples = num_samples
+        self.top_k = ProfilingConfig.top_k if top_k is None else top_k
+        self.max_tracked_values = max_tracked_values or IngestionConfig.max_tracked_values
+        self.num_rows = 0
+        self._schema: Optional[pd.DataFrame] = None
+        self._missing: Optional[pd.Series] = None
+        self._minimums: Dict[Any, Any] = {}
+        self._maximums: Dict[Any, Any] = {}
+        self._counts: Dict[Any, pd.Series] = {}
+        self._num_unique: Dict[Any, int] = {}
+        self._overflowed: set = set()
+        self._samples: Dict[Any, List[Any]] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """
+        Fold one chunk into the statistics.
+
+        Args:
+            chunk (pd.DataFrame): Next chunk of the dataset.
+        """
+        self.num_rows += len(chunk)
+        # An empty concat yields the dtypes every chunk so far can be combined into.
+        self._schema = chunk.iloc[:0] if self._schema is None else pd.concat([self._schema, chunk.iloc[:0]])
+
+        missing = chunk.isna().sum()
+        self._missing = missing if self._missing is None else self._missing.add(missing, fill_value=0)
+
+        numeric = chunk.select_dtypes(include="number").select_dtypes(exclude="bool")
+        if not numeric.empty:
+            for col, value in numeric.min().items():
+                if pd.notna(value):
+                    self._minimums[col] = min(self._minimums.get(col, value), value)
+            for col, value in numeric.max().items():
+                if pd.notna(value):
+                    self._maximums[col] = max(self._maximums.get(col, value), value)
+
+        for col in chunk.columns:
+            counts = chunk[col].value_counts(dropna=True)
+            previous = self._counts.get(col)
+            if previous is not None:
+                counts = previous.add(counts, fill_value=0)
+            self._num_unique[col] = max(self._num_unique.get(col, 0), len(counts))
+            if len(counts) > self.max_tracked_values:
+                self._overflowed.add(col)
+                counts = counts.nlargest(self.max_tracked_values)
+            self._counts[col] = counts
+
+            samples = self._samples.setdefault(col, [])
+            if len(samples) < self.num_samples:
+                for value in chunk[col].dropna().unique()[:self.num_samples]:
+                    value = to_python(value)
+                    if value not in samples and len(samples) < self.num_samples:
+                        samples.append(value)
+
+    def finalize(self, sample: pd.DataFrame = None, quantiles=None) -> Tuple[DataFrameSummary, List[ColumnInfo]]:
+        """
+        Build the dataset summary and per-column details.
+
+        Args:
+            sample (pd.DataFrame, optional): Row sample used for approximate quantiles.
+            quantiles (Sequence[float], optional): Quantiles of numeric columns.
+                Defaults to ProfilingConfig.quantiles.
+
+        Returns:
+            Tuple[DataFrameSummary, List[ColumnInfo]]: Same shape as `profile_dataframe`.
+        """
+        quantiles = ProfilingConfig.quantiles if quantiles is None else quantiles
+        schema = self._schema if self._schema is not None else pd.DataFrame()
+        missing = self._missing if self._missing is not None else pd.Series(dtype=int)
+
+        quantile_table = pd.DataFrame()
+        if sample is not None and not sample.empty:
+            numeric = sample.select_dtypes(include="number").select_dtypes(exclude="bool")
+            if not numeric.empty:
+                quantile_table = numeric.quantile(list(quantiles))
+
+        summary = DataFrameSummary(
+            num_rows=self.num_rows,
+            num_columns=schema.shape[1],
+            columns=[str(col) for col in schema.columns],
+            dtypes={str(col): str(dtype) for col, dtype in schema.dtypes.items()},
+            missing_values={str(col): int(missing.get(col, 0)) for col in schema.columns},
+        )
+
+        columns_info = []
+        for col, dtype in schema.dtypes.items():
+            if col in self._overflowed:
+                print(f"Column {col!r} has more than {self.max_tracked_values} distinct values; "
+                      f"num_unique and top values are approximate.")
+            counts = self._counts.get(col, pd.Series(dtype=int)).sort_values(ascending=False, kind="stable")
+            is_integer = pd.api.types.is_integer_dtype(dtype)
+            minimum, maximum = to_python(self._minimums.get(col)), to_python(self._maximums.get(col))
+            columns_info.append(ColumnInfo(
+                name=str(col),
+                dtype=str(dtype),
+                num_missing=int(missing.get(col, 0)),
+                num_unique=int(self._num_unique.get(col, 0)),
+                sample_values=self._samples.get(col, []),
+                min=int(minimum) if is_integer and minimum is not None else minimum,
+                max=int(maximum) if is_integer and maximum is not None else maximum,
+                quantiles=(
+                    {f"{q:g}": to_python(quantile_table.at[q, col]) for q in quantiles}
+                    if col in quantile_table.columns else None
+                ),
+                top_values=[
+                    {"value": to_python(value), "count": int(count)}
+                    for value, count in counts.head(self.top_k).items()
+                ],
+            ))
+        return summary, columns_info
+
+
+@dataclass
+class IngestedDataset:
+    """
+    Result of streaming a large CSV file.
+
+    Attributes:
+        frame (pd.DataFrame): Bounded-size working frame (uniform reservoir sample of rows).
+        summary (DataFrameSummary): Statistics of the full file.
+        columns_info (List[ColumnInfo]): Per-column details of the full file.
+    """
+    frame: pd.DataFrame
+    summary: DataFrameSummary
+    columns_info: List[ColumnInfo]
+
+
+def ingest_csv(file_path: str, working_rows: int = None, chunk_size: int = None, seed: int = None) -> IngestedDataset:
+    """
+    Stream a CSV file once, profiling it and keeping a bounded working frame.
+
+    Memory stays proportional to `chunk_size + working_rows` (plus the tracked value
+    counts), whatever the file size. Files above ProfilingConfig.approximate_threshold_bytes
+    are profiled with sketches (`SketchProfiler`), which bounds the per-column state too.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        working_rows (int, optional): Rows in the working frame. Defaults to IngestionConfig.working_frame_rows.
+        chunk_size (int, optional): Rows per chunk. Defaults to IngestionConfig.chunk_size.
+        seed (int, optional): Sampling seed. Defaults to IngestionConfig.seed.
+
+    Returns:
+        IngestedDataset: Working frame plus full-file profile.
+    """
+    working_rows = working_rows or IngestionConfig.working_frame_rows
+    seed = IngestionConfig.seed if seed is None else seed
+    dtypes = infer_csv_dtypes(file_path)
+    approximate = use_approximate_profiling(file_path)
+
+    while True:
+        sampler = _ReservoirSampler(working_rows, seed)
+        profiler = SketchProfiler(seed=seed) if approximate else StreamingProfiler()
+        try:
+            for chunk in iter_csv_chunks(file_path, chunk_size=chunk_size, dtypes=dtypes):
+                sampler.update(chunk)
+                profiler.update(chunk)
+            break
+        except (ValueError, TypeError) as e:
+            if not dtypes:
+                raise
+            print(f"Dtype hints rejected for {file_path} ({e}); restarting without hints.")
+            dtypes = {}
+
+    frame = sampler.result()
+    summary, columns_info = profiler.finalize() if approximate else profiler.finalize(frame)
+    print(f"Ingested {file_path} out of core: {summary.num_rows} rows, "
+          f"working frame of {len(frame)} rows.")
+    return IngestedDataset(frame=frame, summary=summary, columns_info=columns_info)
+
+
+def _ingested_paths(fingerprint: str, working_rows: int, seed: int) -> Tuple[str, str]:
+    stem = os.path.join(CacheConfig.columnar_shadow_dir, f"{fingerprint}-sample-{working_rows}-{seed}")
+    return f"{stem}.arrow", f"{stem}.profile.json"
+
+
+def load_ingested_csv(file_path: str, fingerprint: str, working_rows: int = None, seed: int = None) -> IngestedDataset:
+    """
+    Return the ingested form of a large CSV file, streaming it only if no process has yet.
+
+    The working frame is stored as an Arrow file next to the columnar shadow copies,
+    with the full-file profile beside it as JSON, both keyed by the file's content hash
+    and the sampling settings. The first process to load the file streams it and writes
+    both; every other process (the snippet workers in particular) memory-maps the
+    stored frame instead of streaming the whole file again. Without pyarrow nothing is
+    stored and every process streams the file itself.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        fingerprint (str): Content hash of the file.
+        working_rows (int, optional): Rows in the working frame. Defaults to IngestionConfig.working_frame_rows.
+        seed (int, optional): Sampling seed. Defaults to IngestionConfig.seed.
+
+    Returns:
+        IngestedDataset: Working frame plus full-file profile.
+    """
+    working_rows = working_rows or IngestionConfig.working_frame_rows
+    seed = IngestionConfig.seed if seed is None else seed
+    frame_path, profile_path = _ingested_paths(fingerprint, working_rows, seed)
+
+    try:
+        if os.path.exists(frame_path) and os.path.exists(profile_path):
+            with open(profile_path, "r", encoding="utf-8") as f:
+                profile = json.load(f)
+            frame = read_arrow_mmap(frame_path)
+            os.utime(frame_path)
+            return IngestedDataset(
+                frame=frame,
+                summary=DataFrameSummary.model_validate(profile["summary"]),
+                columns_info=[ColumnInfo.model_validate(column) for column in profile["columns_info"]],
+            )
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"Ignoring unreadable working frame of {file_path}: {e}")
+
+    ingested = ingest_csv(file_path, working_rows=working_rows, seed=seed)
+    try:
+        # The profile goes first: the frame file is what marks the pair as complete.
+        os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+        tmp_path = f"{profile_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "summary": ingested.summary.model_dump(mode="json"),
+                "columns_info": [column.model_dump(mode="json") for column in ingested.columns_info],
+            }, f)
+        os.replace(tmp_path, profile_path)
+        write_columnar_copy(ingested.frame, frame_path)
+    except ImportError:
+        print(f"pyarrow is not installed; the working frame of {file_path} is not stored "
+              f"and every worker streams the file itself.")
+    except Exception as e:
+        print(f"Could not store the working frame of {file_path}: {e}")
+    return ingested
@@ -0,0 +1,314 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from schemas.schemas import ColumnInfo, DataFrameSummary
+from config import ProfilingConfig
+from utils.sketches import FrequentItems, HyperLogLog, KllSketch, ReservoirSample
+
+
+def to_python(value: Any) -> Any:
+    """
+    Convert a numpy/pandas scalar into a plain JSON-friendly Python value.
+
+    Args:
+        value (Any): Scalar value.
+
+    Returns:
+        Any: Python scalar (timestamps become ISO strings, NaN, NA and NaT become None).
+    """
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _extreme(extremes: pd.Series, col, dtype) -> Any:
+    # min()/max() over a mixed int/float block upcast to float; restore integer values.
+    if col not in extremes.index:
+        return None
+    value = to_python(extremes[col])
+    if value is not None and pd.api.types.is_integer_dtype(dtype):
+        return int(value)
+    return value
+
+
+def _sample_values(column: pd.Series, num_samples: int, num_unique: int) -> List[Any]:
+    # The first distinct values almost always sit in the first rows, so avoid a full scan.
+    head = column.head(max(1000, num_samples * 100)).dropna().unique()[:num_samples]
+    if len(head) < min(num_samples, num_unique):
+        head = column.dropna().unique()[:num_samples]
+    return [to_python(value) for value in head]
+
+
+def _profile_columns(
+    df: pd.DataFrame,
+    missing: pd.Series,
+    num_samples: int,
+    top_k: int,
+    quantiles: Sequence[float],
+) -> List[ColumnInfo]:
+    numeric = df.select_dtypes(include="number").select_dtypes(exclude="bool")
+    if not numeric.empty:
+        minimums = numeric.min()
+        maximums = numeric.max()
+        quantile_table = numeric.quantile(list(quantiles))
+    else:
+        minimums = maximums = pd.Series(dtype=float)
+        quantile_table = pd.DataFrame()
+
+    columns_info = []
+    for col in df.columns:
+        column = df[col]
+        counts = column.value_counts(dropna=True)
+        num_unique = int(len(counts))
+
+        quantile_values = None
+        if col in quantile_table.columns:
+            quantile_values = {f"{q:g}": to_python(quantile_table.at[q, col]) for q in quantiles}
+
+        columns_info.append(ColumnInfo(
+            name=str(col),
+            dtype=str(column.dtype),
+            num_missing=int(missing[col]),
+            num_unique=num_unique,
+            sample_values=_sample_values(column, num_samples, num_unique),
+            min=_extreme(minimums, col, column.dtype),
+            max=_extreme(maximums, col, column.dtype),
+            quantiles=quantile_values,
+            top_values=[
+                {"value": to_python(value), "count": int(count)}
+                for value, count in counts.head(top_k).items()
+            ],
+        ))
+    return columns_info
+
+
+class SketchProfiler:
+    """
+    Approximate column profiler with constant memory per column.
+
+    Rows are fed chunk by chunk. Row and missing counts and numeric min/max are exact;
+    distinct counts come from a HyperLogLog sketch, quantiles from a KLL sketch, top
+    values from a Misra-Gries summary and sample values from a reservoir sample, so
+    no column's distinct values are ever materialized beyond a single chunk.
+    """
+
+    def __init__(self, num_samples: int = 3, top_k: int = None, seed: int = 0):
+        self.num_samples = num_samples
+        self.top_k = ProfilingConfig.top_k if top_k is None else top_k
+        self.seed = seed
+        self.num_rows = 0
+        self._schema: Optional[pd.DataFrame] = None
+        self._missing: Optional[pd.Series] = None
+        self._minimums: Dict[Any, Any] = {}
+        self._maximums: Dict[Any, Any] = {}
+        self._distinct: Dict[Any, HyperLogLog] = {}
+        self._quantiles: Dict[Any, KllSketch] = {}
+        self._frequent: Dict[Any, FrequentItems] = {}
+        self._samples: Dict[Any, ReservoirSample] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """
+        Fold one chunk into the sketches.
+
+        Args:
+            chunk (pd.DataFrame): Next chunk of the dataset.
+        """
+        self.num_rows += len(chunk)
+        # An empty concat yields the dtypes every chunk so far can be combined into.
+        self._schema = chunk.iloc[:0] if self._schema is None else pd.concat([self._schema, chunk.iloc[:0]])
+
+        missing = chunk.isna().sum()
+        self._missing = missing if self._missing is None else self._missing.add(missing, fill_value=0)
+
+        numeric = chunk.select_dtypes(include="number").select_dtypes(exclude="bool")
+        if not numeric.empty:
+            for col, value in numeric.min().items():
+                if pd.notna(value):
+                    self._minimums[col] = min(self._minimums.get(col, value), value)
+            for col, value in numeric.max().items():
+                if pd.notna(value):
+                    self._maximums[col] = max(self._maximums.get(col, value), value)
+
+        for position, col in enumerate(chunk.columns):
+            column = chunk[col]
+            if col not in self._distinct:
+                self._distinct[col] = HyperLogLog(ProfilingConfig.hll_precision)
+                self._frequent[col] = FrequentItems(ProfilingConfig.frequent_items_capacity)
+                self._samples[col] = ReservoirSample(ProfilingConfig.reservoir_size, self.seed + position)
+            self._distinct[col].update(column)
+            self._frequent[col].update(column)
+            self._samples[col].update(column)
+            if col in numeric.columns:
+                if col not in self._quantiles:
+                    self._quantiles[col] = KllSketch(ProfilingConfig.kll_k, self.seed + position)
+                self._quantiles[col].update(column)
+
+    def finalize(self, quantiles: Sequence[float] = None) -> Tuple[DataFrameSummary, List[ColumnInfo]]:
+        """
+        Build the dataset summary and per-column details from the sketches.
+
+        Args:
+            quantiles (Sequence[float], optional): Quantiles of numeric columns.
+                Defaults to ProfilingConfig.quantiles.
+
+        Returns:
+            Tuple[DataFrameSummary, List[ColumnInfo]]: Same shape as `profile_dataframe`.
+        """
+        quantiles = ProfilingConfig.quantiles if quantiles is None else quantiles
+        schema = self._schema if self._schema is not None else pd.DataFrame()
+        missing = self._missing if self._missing is not None else pd.Series(dtype=int)
+
+        summary = DataFrameSummary(
+            num_rows=self.num_rows,
+            num_columns=schema.shape[1],
+            columns=[str(col) for col in schema.columns],
+            dtypes={str(col): str(dtype) for col, dtype in schema.dtypes.items()},
+            missing_values={str(col): int(missing.get(col, 0)) for col in schema.columns},
+        )
+
+        columns_info = []
+        for col, dtype in schema.dtypes.items():
+            non_missing = self.num_rows - int(missing.get(col, 0))
+            distinct = self._distinct.get(col)
+            # The sketch cannot exceed the number of non-missing values.
+            num_unique = min(distinct.estimate(), non_missing) if distinct is not None else 0
+
+            samples = []
+            for value in self._samples[col].values() if col in self._samples else []:
+                value = to_python(value)
+                if value not in samples:
+                    samples.append(value)
+                if len(samples) == self.num_samples:
+                    break
+
+            quantile_values = None
+            if col in self._quantiles:
+                estimates = self._quantiles[col].quantiles(quantiles)
+                quantile_values = {f"{q:g}": to_python(value) for q, value in zip(quantiles, estimates)}
+
+            is_integer = pd.api.types.is_integer_dtype(dtype)
+            minimum, maximum = to_python(self._minimums.get(col)), to_python(self._maximums.get(col))
+            columns_info.append(ColumnInfo(
+                name=str(col),
+                dtype=str(dtype),
+                num_missing=int(missing.get(col, 0)),
+                num_unique=num_unique,
+                sample_values=samples,
+                min=int(minimum) if is_integer and minimum is not None else minimum,
+                max=int(maximum) if is_integer and maximum is not None else maximum,
+                quantiles=quantile_values,
+                top_values=[
+                    {"value": to_python(item["value"]), "count": item["count"]}
+                    for item in self._frequent[col].top(self.top_k)
+                ] if col in self._frequent else [],
+            ))
+        return summary, columns_info
+
+
+def use_approximate_profiling(file_path: str) -> bool:
+    """
+    Decide whether a dataset file is large enough to be profiled with sketches.
+
+    Args:
+        file_path (str): Path to the dataset file.
+
+    Returns:
+        bool: True if the file exceeds ProfilingConfig.approximate_threshold_bytes.
+    """
+    threshold = ProfilingConfig.approximate_threshold_bytes
+    return threshold is not None and os.path.getsize(file_path) > threshold
+
+
+def profile_dataframe_approx(
+    df: pd.DataFrame,
+    num_samples: int = 3,
+    top_k: int = None,
+    quantiles: Sequence[float] = None,
+    chunk_size: int = None,
+) -> Tuple[DataFrameSummary, List[ColumnInfo]]:
+    """
+    Profile an in-memory DataFrame with sketches instead of exact distinct counts.
+
+    Args:
+        df (pd.DataFrame): Frame to profile.
+        num_samples (int, optional): Sample values per column. Defaults to 3.
+        top_k (int, optional): Most frequent values per column. Defaults to ProfilingConfig.top_k.
+        quantiles (Sequence[float], optional): Quantiles of numeric columns.
+            Defaults to ProfilingConfig.quantiles.
+        chunk_size (int, optional): Rows fed to the sketches at a time.
+            Defaults to ProfilingConfig.sketch_chunk_size.
+
+    Returns:
+        Tuple[DataFrameSummary, List[ColumnInfo]]: Dataset summary and approximate per-column details.
+    """
+    chunk_size = chunk_size or ProfilingConfig.sketch_chunk_size
+    profiler = SketchProfiler(num_samples=num_samples, top_k=top_k)
+    for start in range(0, max(len(df), 1), chunk_size):
+        profiler.update(df.iloc[start:start + chunk_size])
+    return profiler.finalize(quantiles)
+
+
+def profile_dataframe(
+    df: pd.DataFrame,
+    num_samples: int = 3,
+    top_k: int = None,
+    quantiles: Sequence[float] = None,
+    parallel: bool = None,
+    max_workers: int = None,
+) -> Tuple[DataFrameSummary, List[ColumnInfo]]:
+    """
+    Profile every column of a DataFrame in one vectorized pass.
+
+    Missing counts are computed once for the whole frame and min/max/quantiles once for
+    the numeric block. Each column is then hashed a single time with `value_counts`,
+    which yields its cardinality and top-k values together; sample values come from
+    the head of the column. In parallel mode column chunks are profiled on a thread pool.
+
+    Args:
+        df (pd.DataFrame): Frame to profile.
+        num_samples (int, optional): Sample values per column. Defaults to 3.
+        top_k (int, optional): Most frequent values per column. Defaults to ProfilingConfig.top_k.
+        quantiles (Sequence[float], optional): Quantiles of numeric columns.
+            Defaults to ProfilingConfig.quantiles.
+        parallel (bool, optional): Profile column chunks concurrently. Defaults to ProfilingConfig.parallel.
+        max_workers (int, optional): Threads in parallel mode. Defaults to ProfilingConfig.max_workers.
+
+    Returns:
+        Tuple[DataFrameSummary, List[ColumnInfo]]: Dataset summary and per-column details.
+    """
+    top_k = ProfilingConfig.top_k if top_k is None else top_k
+    quantiles = ProfilingConfig.quantiles if quantiles is None else quantiles
+    parallel = ProfilingConfig.parallel if parallel is None else parallel
+    max_workers = max_workers or ProfilingConfig.max_workers
+
+    missing = df.isna().sum()
+
+    summary = DataFrameSummary(
+        num_rows=df.shape[0],
+        num_columns=df.shape[1],
+        columns=[str(col) for col in df.columns],
+        dtypes={str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        missing_values={str(col): int(count) for col, count in missing.items()},
+    )
+
+    if not parallel or max_workers <= 1 or df.shape[1] < 2:
+        return summary, _profile_columns(df, missing, num_samples, top_k, quantiles)
+
+    chunks = [list(chunk) for chunk in np.array_split(np.arange(df.shape[1]), min(max_workers, df.shape[1]))]
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = [
+            executor.submit(_profile_columns, df.iloc[:, chunk], missing, num_samples, top_k, quantiles)
+            for chunk in chunks
+        ]
+        columns_info = [info for future in futures for info in future.result()]
+    return summary, columns_info
@@ -0,0 +1,152 @@
+import time
+import asyncio
+import threading
+from typing import Any, Optional
+
+from crewai import LLM
+
+from config import LLMConfig
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe requests-per-minute and tokens-per-minute limiter.
+
+    Two token buckets refill continuously at `limit / 60` units per second up to one
+    minute's worth of capacity. A caller reserves one request and its estimated token
+    cost up front; if a bucket would go negative the caller waits until it has refilled.
+    Reservations are taken under a lock, so the limiter can be shared by asyncio tasks,
+    threads and concurrent event loops alike.
+
+    Attributes:
+        requests_per_minute (float): Request quota per minute.
+        tokens_per_minute (float): Token quota per minute, or None for no token limit.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: Optional[float] = None):
+        """
+        Initialize the limiter with full buckets.
+
+        Args:
+            requests_per_minute (float): Request quota per minute.
+            tokens_per_minute (float, optional): Token quota per minute. Defaults to None (unlimited).
+        """
+        self._lock = threading.Lock()
+        self.configure(requests_per_minute, tokens_per_minute)
+
+    def configure(self, requests_per_minute: float, tokens_per_minute: Optional[float] = None) -> None:
+        """
+        Change the quotas and start again from full buckets.
+
+        Safe to call while other threads use the limiter: the quotas and both buckets
+        are replaced together under the lock, so no reservation sees a mix of old and
+        new settings.
+
+        Args:
+            requests_per_minute (float): Request quota per minute.
+            tokens_per_minute (float, optional): Token quota per minute. Defaults to None (unlimited).
+
+        Raises:
+            ValueError: If `requests_per_minute` is not positive.
+        """
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive.")
+        with self._lock:
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            self._requests = float(requests_per_minute)
+            self._tokens = float(tokens_per_minute or 0)
+            self._updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def reserve(self, tokens: int = 0) -> float:
+        """
+        Reserve one request and `tokens` tokens.
+
+        Args:
+            tokens (int, optional): Estimated tokens the request will consume.
+
+        Returns:
+            float: Seconds the caller must wait before sending the request.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._requests -= 1
+            wait = max(0.0, -self._requests * 60 / self.requests_per_minute)
+            if self.tokens_per_minute and tokens:
+                self._tokens -= tokens
+                wait = max(wait, -self._tokens * 60 / self.tokens_per_minute)
+            return wait
+
+    def adjust(self, token_delta: int) -> None:
+        """
+        Correct a reservation once the real token usage is known.
+
+        Args:
+            token_delta (int): Actual tokens minus the estimate that was reserved.
+        """
+        if not self.tokens_per_minute or not token_delta:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= token_delta
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Wait (without blocking the event loop) until a request may be sent.
+
+        Args:
+            tokens (int, optional): Estimated tokens the request will consume.
+        """
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, tokens: int = 0) -> None:
+        """
+        Block the calling thread until a request may be sent.
+
+        Args:
+            tokens (int, optional): Estimated tokens the request will consume.
+        """
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+
+llm_rate_limiter = TokenBucketRateLimiter(LLMConfig.max_rpm, LLMConfig.max_tpm)
+
+
+class RateLimitedLLM(LLM):
+    """
+    CrewAI LLM whose calls wait on a shared `TokenBucketRateLimiter`.
+
+    CrewAI's own `max_rpm` is enforced per agent, so several crews running at once
+    (one per dataset in a batch) multiply the request rate. Routing every agent call
+    through one limiter, the same one the insight requests use, keeps the whole
+    process within the provider quota.
+
+    Attributes:
+        limiter (TokenBucketRateLimiter): Limiter shared by all calls.
+    """
+
+    def __init__(self, *args: Any, limiter: Optional[TokenBucketRateLimiter] = None, **kwargs: Any):
+        """
+        Args:
+            *args: Positional arguments of `crewai.LLM`.
+            limiter (TokenBucketRateLimiter, optional): Limiter to wait on. Defaults to `llm_rate_limiter`.
+            **kwargs: Keyword arguments of `crewai.LLM`.
+        """
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter or llm_rate_limiter
+
+    def call(self, messages, *args: Any, **kwargs: Any):
+        # The prompt size is the only cost known before the call; roughly four characters per token.
+        self.limiter.acquire_sync(len(str(messages)) // 4)
+        return super().call(messages, *args, **kwargs)
@@ -0,0 +1,197 @@
+import os
+import uuid
+from typing import Optional
+
+import pandas as pd
+
+from config import CacheConfig
+
+
+CSV_EXTENSIONS = (".csv", ".csv.gz", ".csv.bz2", ".csv.xz", ".csv.zst", ".csv.zip")
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".feather", ".arrow", ".ipc")
+DATASET_EXTENSIONS = CSV_EXTENSIONS + PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+# File dialog filter matching every supported input format.
+DATASET_FILE_FILTER = (
+    "Datasets (" + " ".join(f"*{ext}" for ext in DATASET_EXTENSIONS) + ");;"
+    "CSV Files (" + " ".join(f"*{ext}" for ext in CSV_EXTENSIONS) + ");;"
+    "Parquet Files (" + " ".join(f"*{ext}" for ext in PARQUET_EXTENSIONS) + ");;"
+    "Arrow/Feather Files (" + " ".join(f"*{ext}" for ext in ARROW_EXTENSIONS) + ")"
+)
+
+
+def dataset_format(file_path: str) -> str:
+    """
+    Detect the format of a dataset file from its extension.
+
+    Unknown extensions are treated as CSV, which is what the pipeline always assumed.
+
+    Args:
+        file_path (str): Path to the dataset file.
+
+    Returns:
+        str: "csv" (plain or compressed), "parquet" or "arrow".
+    """
+    name = os.fspath(file_path).lower()
+    if name.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    if name.endswith(ARROW_EXTENSIONS):
+        return "arrow"
+    return "csv"
+
+
+def read_arrow_mmap(file_path: str) -> pd.DataFrame:
+    """
+    Read an Arrow IPC / Feather v2 file through a memory map.
+
+    Numeric columns without nulls are wrapped zero-copy around the mapped pages, so
+    every process reading the same file shares them through the page cache instead
+    of holding a private copy.
+
+    Args:
+        file_path (str): Path to the Arrow/Feather file.
+
+    Returns:
+        pd.DataFrame: The dataset.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    import pyarrow as pa
+
+    source = pa.memory_map(os.fspath(file_path), "r")
+    try:
+        table = pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        # Feather v1 or streaming-format files cannot be mapped; fall back to a regular read.
+        source.close()
+        return pd.read_feather(file_path)
+    return table.to_pandas(split_blocks=True)
+
+
+_missing_pyarrow_reported = False
+
+
+def _report_missing_pyarrow() -> None:
+    # Printed once per process; every CSV read falls back the same way.
+    global _missing_pyarrow_reported
+    if not _missing_pyarrow_reported:
+        _missing_pyarrow_reported = True
+        print("pyarrow is not installed; CSV files are parsed on every load instead of "
+              "using columnar copies (pip install pyarrow).")
+
+
+def _shadow_path(fingerprint: str) -> str:
+    return os.path.join(CacheConfig.columnar_shadow_dir, f"{fingerprint}.arrow")
+
+
+def _evict_shadows(keep: str) -> None:
+    # Least recently used shadow copies go first; reads touch the file's mtime.
+    directory = CacheConfig.columnar_shadow_dir
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith(".arrow") and path != keep:
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries) + os.path.getsize(keep)
+    for _, size, path in sorted(entries):
+        if total <= CacheConfig.columnar_shadow_max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def write_columnar_copy(frame: pd.DataFrame, path: str) -> None:
+    """
+    Atomically write a frame as an uncompressed Arrow file in the columnar cache.
+
+    Uncompressed, so the copy can be memory-mapped without decoding. Older copies are
+    evicted once the cache is over `CacheConfig.columnar_shadow_max_bytes`.
+
+    Args:
+        frame (pd.DataFrame): Frame to store.
+        path (str): Destination inside `CacheConfig.columnar_shadow_dir`.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        frame.to_feather(tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _evict_shadows(path)
+
+
+def read_csv_with_shadow(file_path: str, fingerprint: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read a (possibly compressed) CSV file, reusing its columnar shadow copy when there is one.
+
+    The first read parses the text and stores an uncompressed Arrow copy keyed by the
+    file's content hash; later reads memory-map that copy and skip text parsing entirely.
+    Without a fingerprint this is a plain `pd.read_csv`. Without pyarrow, or when the
+    copy cannot be written (read-only or full cache directory), the file is parsed as
+    usual and a message says so; the next load parses it again.
+
+    Args:
+        file_path (str): Path to the CSV file.
+        fingerprint (str, optional): Content hash of the file, used as the shadow key.
+
+    Returns:
+        pd.DataFrame: The dataset.
+    """
+    if not CacheConfig.columnar_shadow_enabled or fingerprint is None:
+        return pd.read_csv(file_path)
+
+    shadow_path = _shadow_path(fingerprint)
+    try:
+        if os.path.exists(shadow_path):
+            frame = read_arrow_mmap(shadow_path)
+            os.utime(shadow_path)
+            return frame
+    except ImportError:
+        _report_missing_pyarrow()
+        return pd.read_csv(file_path)
+    except Exception as e:
+        print(f"Ignoring unreadable columnar copy of {file_path}: {e}")
+
+    frame = pd.read_csv(file_path)
+    try:
+        write_columnar_copy(frame, shadow_path)
+    except ImportError:
+        _report_missing_pyarrow()
+    except Exception as e:
+        print(f"Could not write columnar copy of {file_path}, it will be parsed again on the next load: {e}")
+    return frame
+
+
+def read_dataset(file_path: str, fingerprint: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read a dataset in any supported format.
+
+    Args:
+        file_path (str): Path to a CSV (optionally gzip/bz2/xz/zstd/zip compressed),
+            Parquet or Arrow IPC/Feather file.
+        fingerprint (str, optional): Content hash of the file; enables the columnar
+            shadow copy of CSV inputs.
+
+    Returns:
+        pd.DataFrame: The dataset.
+
+    Raises:
+        ImportError: If a Parquet/Arrow file is given and pyarrow is not installed.
+    """
+    file_format = dataset_format(file_path)
+    if file_format == "parquet":
+        return pd.read_parquet(file_path)
+    if file_format == "arrow":
+        return read_arrow_mmap(file_path)
+    return read_csv_with_shadow(file_path, fingerprint)
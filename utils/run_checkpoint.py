@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Dict, List, Optional
+
+from config import PipelineConfig
+from schemas.schemas import CodeWithInsights, FigureCodeWithImage
+from utils.snippet_dedupe import snippet_fingerprint
+
+
+# Pipeline stages in execution order; each completed stage is saved as `<name>.json`.
+STAGE_NAMES = (
+    "dataframe_info",
+    "recommendation",
+    "simple_code",
+    "intermediate_code",
+    "advanced_code",
+    "simple_insights",
+    "intermediate_insights",
+    "advanced_insights",
+)
+
+_FIGURES_FILE = "figures.jsonl"
+_INSIGHTS_FILE = "insights.jsonl"
+
+
+def _read_jsonl(path: str) -> List[dict]:
+    # A run killed mid-write leaves at most one truncated last line; it is skipped.
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+class RunCheckpoint:
+    """
+    Run directory holding the outputs of an analysis run as they complete.
+
+    Every finished stage (DataFrameInfo, AnalysisRecommendation, the three AnalysisCode
+    results and the three CodesWithInsights) is written to its own JSON file together
+    with its stage key. Executed figures and per-figure insights are appended to JSON
+    Lines files as they complete. A resumed run reloads a stage only if its stored key
+    still matches, and skips snippets whose insight or figure is already recorded.
+
+    Attributes:
+        run_dir (str): Directory of the run.
+    """
+
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        self._lock = threading.Lock()
+        os.makedirs(run_dir, exist_ok=True)
+
+    @classmethod
+    def for_dataset(cls, csv_path: str, fingerprint: str, number_of_analyses: int, dark_theme: bool, resume: bool) -> "RunCheckpoint":
+        """
+        Open the run directory of a dataset and run settings.
+
+        Args:
+            csv_path (str): Dataset path.
+            fingerprint (str): Content hash of the dataset.
+            number_of_analyses (int): Requested number of analyses.
+            dark_theme (bool): Whether the report uses the dark theme.
+            resume (bool): Keep what an earlier run left; otherwise start from an empty directory.
+
+        Returns:
+            RunCheckpoint: The checkpoint.
+        """
+        stem = os.path.basename(os.fspath(csv_path)).split(".")[0] or "dataset"
+        name = f"{stem}-{fingerprint[:12]}-{number_of_analyses}{'-dark' if dark_theme else ''}"
+        run_dir = os.path.join(PipelineConfig.checkpoint_dir, name)
+        if not resume and os.path.isdir(run_dir):
+            shutil.rmtree(run_dir)
+        checkpoint = cls(run_dir)
+        if resume:
+            completed = [stage for stage in STAGE_NAMES if os.path.exists(checkpoint._stage_path(stage))]
+            print(f"Resuming run in {run_dir}: {len(completed)} of {len(STAGE_NAMES)} stages completed, "
+                  f"{len(_read_jsonl(os.path.join(run_dir, _INSIGHTS_FILE)))} figure insights recorded.")
+        return checkpoint
+
+    def _stage_path(self, name: str) -> str:
+        return os.path.join(self.run_dir, f"{name}.json")
+
+    def _append(self, file_name: str, records: List[dict]) -> None:
+        with self._lock, open(os.path.join(self.run_dir, file_name), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def save_stage(self, name: str, key: str, raw: str, pydantic: dict) -> None:
+        """
+        Record a completed stage.
+
+        Args:
+            name (str): Stage name, one of `STAGE_NAMES`.
+            key (str): Stage key; a resumed run only reuses the output under the same key.
+            raw (str): Raw task output.
+            pydantic (dict): Dumped pydantic output.
+        """
+        path = self._stage_path(name)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "raw": raw, "pydantic": pydantic}, f)
+        os.replace(tmp_path, path)
+
+    def load_stage(self, name: str, key: str) -> Optional[dict]:
+        """
+        Return a recorded stage output if it was produced under the given key.
+
+        Args:
+            name (str): Stage name.
+            key (str): Current stage key.
+
+        Returns:
+            Optional[dict]: `{"raw", "pydantic"}`, or None if missing or stale.
+        """
+        try:
+            with open(self._stage_path(name), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return record if record.get("key") == key else None
+
+    def save_figures(self, figures: List[FigureCodeWithImage]) -> None:
+        """
+        Record executed figures, without their images.
+
+        Args:
+            figures (List[FigureCodeWithImage]): Figures that executed successfully.
+        """
+        self._append(_FIGURES_FILE, [
+            {
+                "fingerprint": snippet_fingerprint(figure.code),
+                "figure_json": figure.figure_json,
+                "summary": figure.summary,
+            }
+            for figure in figures if figure.status == "ok" and figure.figure_json is not None
+        ])
+
+    def load_figures(self, codes: List[str]) -> Dict[str, FigureCodeWithImage]:
+        """
+        Recorded figures of the given snippets.
+
+        Args:
+            codes (List[str]): Snippets about to be executed.
+
+        Returns:
+            Dict[str, FigureCodeWithImage]: Figures by snippet, still to be rendered.
+        """
+        records = {record["fingerprint"]: record for record in _read_jsonl(os.path.join(self.run_dir, _FIGURES_FILE))}
+        figures = {}
+        for code in codes:
+            record = records.get(snippet_fingerprint(code))
+            if record is not None:
+                figures[code] = FigureCodeWithImage(
+                    code=code, figure_img_base64="", figure_json=record["figure_json"], summary=record.get("summary")
+                )
+        return figures
+
+    def save_insight(self, result: CodeWithInsights) -> None:
+        """
+        Record the insight of one figure as soon as it is known.
+
+        Args:
+            result (CodeWithInsights): Snippet and its insight.
+        """
+        if result.insights:
+            self._append(_INSIGHTS_FILE, [{"fingerprint": snippet_fingerprint(result.code), "insights": result.insights}])
+
+    def load_insights(self, codes: List[str]) -> Dict[str, CodeWithInsights]:
+        """
+        Recorded insights of the given snippets.
+
+        Args:
+            codes (List[str]): Snippets about to be converted.
+
+        Returns:
+            Dict[str, CodeWithInsights]: Insights by snippet.
+        """
+        records = {record["fingerprint"]: record["insights"] for record in _read_jsonl(os.path.join(self.run_dir, _INSIGHTS_FILE))}
+        insights = {}
+        for code in codes:
+            text = records.get(snippet_fingerprint(code))
+            if text:
+                insights[code] = CodeWithInsights(code=code, insights=text)
+        return insights
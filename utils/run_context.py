@@ -0,0 +1,124 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+from utils.run_checkpoint import RunCheckpoint
+from utils.snippet_dedupe import snippet_fingerprint
+
+
+class RunContext:
+    """
+    State shared by every stage of one analysis run over a dataset.
+
+    The simple, intermediate and advanced branches each hand their snippets to
+    `claim_snippets`; a snippet whose canonical fingerprint was already claimed in
+    the run by another branch is dropped, so it is executed, rendered and sent for
+    insights only once. A branch may claim its own snippets again, so a retried
+    tool call gets back everything an earlier, failed attempt had claimed.
+
+    Attributes:
+        csv_path (str): Dataset the run works on.
+        checkpoint (Optional[RunCheckpoint]): Where the run records completed work, if anywhere.
+        duplicates_dropped (int): Snippets dropped as duplicates so far.
+    """
+
+    def __init__(self, csv_path: str, checkpoint: Optional[RunCheckpoint] = None):
+        self.csv_path = csv_path
+        self.checkpoint = checkpoint
+        self.duplicates_dropped = 0
+        self._claimed: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def claim_snippets(self, codes: List[str], label: str = "") -> List[str]:
+        """
+        Keep the snippets not claimed by another claimant in this run and remember them.
+
+        Args:
+            codes (List[str]): Snippets about to be executed.
+            label (str, optional): Who is claiming them (e.g. the stage name). Snippets
+                already claimed under the same label are kept.
+
+        Returns:
+            List[str]: Snippets owned by `label`, without duplicates, in their original order.
+        """
+        fingerprints = [snippet_fingerprint(code) for code in codes]
+        unique, seen = [], set()
+        with self._lock:
+            for code, fingerprint in zip(codes, fingerprints):
+                if fingerprint in seen or self._claimed.get(fingerprint, label) != label:
+                    self.duplicates_dropped += 1
+                    continue
+                self._claimed[fingerprint] = label
+                seen.add(fingerprint)
+                unique.append(code)
+
+        dropped = len(codes) - len(unique)
+        if dropped:
+            print(f"Dropped {dropped} duplicate snippet(s){f' from {label}' if label else ''}; "
+                  f"saved {dropped} render(s) and {dropped} insight call(s).")
+        return unique
+
+    def report(self) -> str:
+        """
+        Summarize what deduplication saved over the run.
+
+        Returns:
+            str: One-line summary.
+        """
+        return (
+            f"Snippet deduplication: {self.duplicates_dropped} duplicate(s) dropped across the run, "
+            f"saving {self.duplicates_dropped} figure render(s) and {self.duplicates_dropped} insight call(s)."
+        )
+
+
+_runs: Dict[str, RunContext] = {}
+_runs_lock = threading.Lock()
+
+
+def _run_key(csv_path: str) -> str:
+    return os.path.abspath(csv_path)
+
+
+def start_run(csv_path: str, checkpoint: Optional[RunCheckpoint] = None) -> RunContext:
+    """
+    Begin a fresh run over a dataset, replacing any previous run context for it.
+
+    Args:
+        csv_path (str): Dataset the run works on.
+        checkpoint (RunCheckpoint, optional): Where the run records completed work.
+
+    Returns:
+        RunContext: The new context.
+    """
+    context = RunContext(csv_path, checkpoint)
+    with _runs_lock:
+        _runs[_run_key(csv_path)] = context
+    return context
+
+
+def get_run_context(csv_path: str) -> Optional[RunContext]:
+    """
+    Return the active run context of a dataset.
+
+    Args:
+        csv_path (str): Dataset path.
+
+    Returns:
+        Optional[RunContext]: The context, or None if no run is active for the dataset.
+    """
+    with _runs_lock:
+        return _runs.get(_run_key(csv_path))
+
+
+def end_run(csv_path: str) -> Optional[RunContext]:
+    """
+    Finish the active run of a dataset.
+
+    Args:
+        csv_path (str): Dataset path.
+
+    Returns:
+        Optional[RunContext]: The finished context, or None if no run was active.
+    """
+    with _runs_lock:
+        return _runs.pop(_run_key(csv_path), None)
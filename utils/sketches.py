@@ -0,0 +1,253 @@
+import math
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """
+    Hash a column's non-null values to 64-bit integers in one vectorized call.
+
+    Args:
+        values (pd.Series): Values to hash.
+
+    Returns:
+        np.ndarray: uint64 hashes, one per non-null value.
+    """
+    return pd.util.hash_pandas_object(values.dropna(), index=False).to_numpy(dtype=np.uint64)
+
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality sketch.
+
+    Uses `2 ** precision` one-byte registers (16 KB at the default precision of 14),
+    whatever the number of distinct values, with a relative standard error of about
+    `1.04 / sqrt(2 ** precision)` (0.8% at precision 14).
+
+    Attributes:
+        precision (int): Number of index bits.
+        registers (np.ndarray): Maximum rank seen per register.
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 11 <= precision <= 18:
+            raise ValueError("precision must be between 11 and 18.")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: pd.Series) -> None:
+        """
+        Add the non-null values of a column.
+
+        Args:
+            values (pd.Series): Values to count.
+        """
+        hashes = hash_values(values)
+        if hashes.size == 0:
+            return
+        remaining_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << remaining_bits) - 1)
+        # `rest` has at most 53 bits, so frexp on its float64 value yields the exact bit length.
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (remaining_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """
+        Fold another sketch of the same precision into this one.
+
+        Args:
+            other (HyperLogLog): Sketch to merge.
+        """
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        """
+        Estimate the number of distinct values seen.
+
+        Returns:
+            int: Approximate distinct count.
+        """
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class KllSketch:
+    """
+    KLL-style streaming quantile sketch for numeric values.
+
+    Values are kept in a hierarchy of compactors; when a level overflows it is sorted
+    and every other item (random offset) is promoted to the next level with double
+    weight. Memory is O(k) items and the rank error is roughly O(1/k).
+
+    Attributes:
+        k (int): Capacity of the top compactor.
+        count (int): Number of values seen.
+    """
+
+    _DECAY = 2 / 3
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self._levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(8, int(math.ceil(self.k * self._DECAY ** depth)))
+
+    def update(self, values: pd.Series) -> None:
+        """
+        Add the non-null numeric values of a column.
+
+        Args:
+            values (pd.Series): Values to add.
+        """
+        array = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        array = array[np.isfinite(array)]
+        if array.size == 0:
+            return
+        self.count += array.size
+        self._levels[0] = np.concatenate([self._levels[0], array])
+        self._compress()
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                if items.size % 2:
+                    # Keep one item back so that the promoted half is exactly half.
+                    keep, items = items[-1:], items[:-1]
+                else:
+                    keep = np.empty(0)
+                promoted = items[self._rng.integers(2)::2]
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, fractions: Sequence[float]) -> List[float]:
+        """
+        Approximate quantiles of the values seen.
+
+        Args:
+            fractions (Sequence[float]): Quantile fractions in [0, 1].
+
+        Returns:
+            List[float]: One value per fraction (NaN if nothing was added).
+        """
+        if self.count == 0:
+            return [float("nan")] * len(fractions)
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(level.size, 2 ** i, dtype=np.float64) for i, level in enumerate(self._levels)])
+        order = np.argsort(items, kind="stable")
+        items, cumulative = items[order], np.cumsum(weights[order])
+        total = cumulative[-1]
+        positions = np.searchsorted(cumulative, [q * total for q in fractions], side="left")
+        return [float(items[min(position, items.size - 1)]) for position in positions]
+
+
+class FrequentItems:
+    """
+    Misra-Gries heavy-hitter summary with at most `capacity` counters.
+
+    Reported counts underestimate true counts by at most `n / (capacity + 1)`, where
+    `n` is the number of values seen; any value more frequent than that is kept.
+
+    Attributes:
+        capacity (int): Maximum number of tracked values.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._counts = pd.Series(dtype=np.int64)
+
+    def update(self, values: pd.Series) -> None:
+        """
+        Add the non-null values of a column.
+
+        Args:
+            values (pd.Series): Values to count.
+        """
+        counts = values.value_counts(dropna=True)
+        if len(counts) == 0:
+            return
+        merged = counts if self._counts.empty else self._counts.add(counts, fill_value=0)
+        if len(merged) > self.capacity:
+            # Subtracting the (capacity+1)-th count keeps the summary mergeable and bounded.
+            threshold = merged.nlargest(self.capacity + 1).iloc[-1]
+            merged = merged[merged > threshold] - threshold
+        self._counts = merged.astype(np.int64)
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        """
+        Most frequent values with their (lower-bound) counts.
+
+        Args:
+            k (int): Number of values.
+
+        Returns:
+            List[Dict[str, Any]]: `{"value", "count"}` entries, most frequent first.
+        """
+        top = self._counts.sort_values(ascending=False, kind="stable").head(k)
+        return [{"value": value, "count": int(count)} for value, count in top.items()]
+
+
+class ReservoirSample:
+    """
+    Uniform random sample of at most `size` non-null values of a column.
+
+    Attributes:
+        size (int): Sample size.
+    """
+
+    def __init__(self, size: int = 64, seed: int = 0):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+        self._values = np.empty(0, dtype=object)
+        self._keys = np.empty(0)
+
+    def update(self, values: pd.Series) -> None:
+        """
+        Offer the non-null values of a column to the sample.
+
+        Args:
+            values (pd.Series): Values to sample from.
+        """
+        values = values.dropna()
+        if values.empty:
+            return
+        # Keeping the values with the smallest random keys is a uniform sample without replacement;
+        # only the chunk's own `size` smallest keys can make it into the sample.
+        keys = self._rng.random(len(values))
+        if keys.size > self.size:
+            candidates = np.argpartition(keys, self.size - 1)[:self.size]
+            keys, values = keys[candidates], values.iloc[candidates]
+        keys = np.concatenate([self._keys, keys])
+        pool = np.concatenate([self._values, values.to_numpy(dtype=object)])
+        if pool.size > self.size:
+            keep = np.argpartition(keys, self.size - 1)[:self.size]
+            pool, keys = pool[keep], keys[keep]
+        self._values, self._keys = pool, keys
+
+    def values(self) -> List[Any]:
+        """
+        Sampled values, in random order.
+
+        Returns:
+            List[Any]: The sample.
+        """
+        return list(self._values[np.argsort(self._keys)]) if self._values.size else []
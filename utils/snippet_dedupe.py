@@ -0,0 +1,127 @@
+import ast
+import builtins
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+
+# Keyword arguments that only change presentation, not what is plotted.
+PRESENTATION_KEYWORDS = {"title", "labels", "template", "width", "height", "hover_name", "hover_data", "text_auto"}
+
+# Names a snippet gets from its namespace; they keep their identity when canonicalizing.
+NAMESPACE_NAMES = {"px", "go", "pd", "np", "data", "datetime", "fig"}
+
+
+class _Canonicalizer(ast.NodeTransformer):
+    """Renames local variables in order of first use and drops presentation-only arguments."""
+
+    def __init__(self):
+        self._names: Dict[str, str] = {}
+        self._keep = NAMESPACE_NAMES | set(dir(builtins))
+
+    def _rename(self, name: str) -> str:
+        if name in self._keep:
+            return name
+        if name not in self._names:
+            self._names[name] = f"v{len(self._names)}"
+        return self._names[name]
+
+    def visit_Import(self, node):
+        # Imports only bind module names; whether a snippet repeats them does not change the figure.
+        return None
+
+    def visit_ImportFrom(self, node):
+        return None
+
+    def visit_Name(self, node):
+        node.id = self._rename(node.id)
+        return node
+
+    def visit_arg(self, node):
+        node.arg = self._rename(node.arg)
+        node.annotation = None
+        return node
+
+    def visit_FunctionDef(self, node):
+        node.name = self._rename(node.name)
+        node.returns = None
+        return self.generic_visit(node)
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        # Keyword order is irrelevant; `**kwargs` (arg None) keep their relative position last.
+        node.keywords.sort(key=lambda keyword: (keyword.arg is None, keyword.arg or ""))
+        return node
+
+    def visit_keyword(self, node):
+        if node.arg is not None and (node.arg in PRESENTATION_KEYWORDS or node.arg.endswith("_title")):
+            return None
+        return self.generic_visit(node)
+
+    def visit_Expr(self, node):
+        # Bare string statements (docstrings) and presentation-only calls do not affect the figure.
+        if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            return None
+        self.generic_visit(node)
+        if isinstance(node.value, ast.Call) and not node.value.args and not node.value.keywords:
+            func = node.value.func
+            if isinstance(func, ast.Attribute) and func.attr.startswith("update_"):
+                return None
+        return node
+
+
+def canonicalize_snippet(code: str) -> Optional[str]:
+    """
+    Reduce a snippet to a canonical form that ignores naming and presentation.
+
+    Comments, formatting, docstrings, imports, keyword order, local variable names,
+    titles, axis labels, templates and sizes are normalized away, so two snippets
+    that plot the same data the same way map to the same string.
+
+    Args:
+        code (str): Plotly snippet.
+
+    Returns:
+        Optional[str]: Canonical AST dump, or None if the snippet does not parse.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    tree = ast.fix_missing_locations(_Canonicalizer().visit(tree))
+    return ast.dump(tree, annotate_fields=False, include_attributes=False)
+
+
+def snippet_fingerprint(code: str) -> str:
+    """
+    Fingerprint a snippet by its canonical form.
+
+    Snippets that do not parse fall back to their whitespace-trimmed text.
+
+    Args:
+        code (str): Plotly snippet.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    canonical = canonicalize_snippet(code)
+    return hashlib.sha256((canonical if canonical is not None else code.strip()).encode("utf-8")).hexdigest()
+
+
+def dedupe_snippets(codes: List[str]) -> Tuple[List[str], int]:
+    """
+    Drop snippets that are semantically identical to an earlier one in the list.
+
+    Args:
+        codes (List[str]): Plotly snippets.
+
+    Returns:
+        Tuple[List[str], int]: Unique snippets in their original order, and the number dropped.
+    """
+    seen = set()
+    unique = []
+    for code in codes:
+        fingerprint = snippet_fingerprint(code)
+        if fingerprint not in seen:
+            seen.add(fingerprint)
+            unique.append(code)
+    return unique, len(codes) - len(unique)
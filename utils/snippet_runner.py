@@ -0,0 +1,72 @@
+import base64
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+import plotly.express as px
+
+from schemas.schemas import FigureCodeWithImage
+from core.dataset_registry import build_snippet_namespace, copy_on_write
+
+
+# Kept free of the LLM stack (crewai, litellm, insight helpers): the sandboxed snippet
+# workers import this module, and every spawn or recycle pays for whatever it imports.
+
+
+def _execution_failure(code: str, message: str, status: str = "error") -> FigureCodeWithImage:
+    return FigureCodeWithImage(
+        code=code,
+        figure_img_base64=base64.b64encode(
+            f"Code execution failed: {message}".encode("utf-8")
+        ).decode("utf-8"),
+        status=status,
+        error=message,
+    )
+
+
+def execute_plotly_code(code: str, csv_path: Optional[str]) -> FigureCodeWithImage:
+    """
+    Executes a given Plotly code snippet with the dataset exposed as `data`,
+    and returns the resulting figure serialized as JSON (no image is rendered).
+
+    The dataset comes from the shared dataset registry, so the CSV is parsed once
+    per process; `pd.read_csv(csv_path)` inside the snippet is served from the same cache.
+    On failure `figure_json` is None, `status`/`error` describe the failure and
+    `figure_img_base64` carries the error message.
+    """
+
+    if csv_path:
+        globals_vars = build_snippet_namespace(csv_path, px=px, datetime=datetime)
+    else:
+        globals_vars = {"px": px, "pd": pd, "datetime": datetime}
+
+    try:
+        with copy_on_write():
+            exec(code, globals_vars)
+    except MemoryError:
+        return _execution_failure(code, "memory limit exceeded", "memory_exceeded")
+    except Exception as e:
+        return _execution_failure(code, str(e))
+
+    # Find the first Plotly Figure object
+    fig = None
+    for var in globals_vars.values():
+        if "Figure" in str(type(var)):
+            fig = var
+            break
+
+    if not fig:
+        return FigureCodeWithImage(
+            code=code,
+            figure_img_base64=base64.b64encode(
+                b"No Plotly Figure found"
+            ).decode("utf-8"),
+            status="error",
+            error="No Plotly Figure found",
+        )
+
+    return FigureCodeWithImage(
+        code=code,
+        figure_img_base64="",
+        figure_json=fig.to_json()
+    )
@@ -0,0 +1,128 @@
+import io
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Tuple, Union
+
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+
+class CompiledTemplate:
+    """
+    A `{{placeholder}}` template parsed once into a render plan.
+
+    The plan is a flat list of literal strings and placeholder names. Rendering walks
+    it once and hands each piece straight to a writer, so no intermediate copies of
+    the output are made regardless of how large the substituted values are.
+    Placeholders without a value are written back unchanged.
+
+    Attributes:
+        source (str): Original template text.
+        placeholders (set): Names of the placeholders used in the template.
+    """
+
+    def __init__(self, source: str):
+        """
+        Parse a template.
+
+        Args:
+            source (str): Template text.
+        """
+        self.source = source
+        self._plan: List[Tuple[bool, str]] = []
+
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > position:
+                self._plan.append((False, source[position:match.start()]))
+            self._plan.append((True, match.group(1)))
+            position = match.end()
+        if position < len(source):
+            self._plan.append((False, source[position:]))
+
+        self.placeholders = {text for is_placeholder, text in self._plan if is_placeholder}
+
+    def render_to(self, write: Callable[[str], object], values: Dict[str, str]) -> None:
+        """
+        Render the template into a writer in a single pass.
+
+        Args:
+            write (Callable[[str], object]): Sink such as `file.write`.
+            values (Dict[str, str]): Placeholder name -> replacement text.
+        """
+        for is_placeholder, text in self._plan:
+            if not is_placeholder:
+                write(text)
+            elif text in values:
+                write(values[text])
+            else:
+                write("{{" + text + "}}")
+
+    def render(self, values: Dict[str, str]) -> str:
+        """
+        Render the template to a string.
+
+        Args:
+            values (Dict[str, str]): Placeholder name -> replacement text.
+
+        Returns:
+            str: Rendered text.
+        """
+        buffer = io.StringIO()
+        self.render_to(buffer.write, values)
+        return buffer.getvalue()
+
+    def split(self, name: str) -> Tuple["CompiledTemplate", "CompiledTemplate"]:
+        """
+        Split the template at the first occurrence of a placeholder.
+
+        Args:
+            name (str): Placeholder name, e.g. "blocks".
+
+        Returns:
+            Tuple[CompiledTemplate, CompiledTemplate]: Templates before and after the placeholder.
+
+        Raises:
+            ValueError: If the placeholder is not in the template.
+        """
+        marker = "{{" + name + "}}"
+        if name not in self.placeholders:
+            raise ValueError(f"Template has no {marker} placeholder.")
+        head, tail = self.source.split(marker, 1)
+        return CompiledTemplate(head), CompiledTemplate(tail)
+
+
+_template_cache: Dict[Tuple[str, int, int], CompiledTemplate] = {}
+_template_lock = threading.Lock()
+
+
+def load_template(file_path: Union[str, os.PathLike]) -> CompiledTemplate:
+    """
+    Load and compile a template file, reusing the compiled plan while the file is unchanged.
+
+    Args:
+        file_path (str): Path to the template file.
+
+    Returns:
+        CompiledTemplate: Compiled template, cached per path, mtime and size.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    key = (abs_path, stat.st_mtime_ns, stat.st_size)
+
+    with _template_lock:
+        template = _template_cache.get(key)
+    if template is not None:
+        return template
+
+    with open(abs_path, "r", encoding="utf-8") as f:
+        template = CompiledTemplate(f.read())
+    with _template_lock:
+        for stale_key in [k for k in _template_cache if k[0] == abs_path]:
+            del _template_cache[stale_key]
+        _template_cache[key] = template
+    return template
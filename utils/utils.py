@@ -1,17 +1,31 @@
 
-from schemas.schemas import DataFrameInfo, DataFrameSummary, ColumnInfo, FigureCodeWithImage, FiguresCodeWithImage, CodesWithInsights, CodeWithInsights, AllCodesWithInsights
+from schemas.schemas import DataFrameInfo, FigureCodeWithImage, FiguresCodeWithImage, CodesWithInsights, CodeWithInsights, AllCodesWithInsights
 from crewai.tools import tool
-import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
+import re
+import json
 import base64
-import pandas as pd
-import plotly.express as px
+from typing import Callable, Optional
 import plotly.io as pio
 
-from config import InsightsLLMConfig
+from config import InsightsLLMConfig, CacheConfig
+from services.snippet_executor import get_snippet_executor
+from services.figure_renderer import get_figure_renderer
+from utils.figure_store import store_figure
+from utils.profiling import profile_dataframe, profile_dataframe_approx, use_approximate_profiling
+from utils.digest import build_dataset_digest
+from utils.figure_summary import figure_summary_text
+from utils.code_validation import validate_snippets
+from utils.run_context import get_run_context
+from utils.run_checkpoint import RunCheckpoint
+from utils.snippet_dedupe import dedupe_snippets
+from core.dataset_registry import dataset_registry
+from utils.snippet_runner import execute_plotly_code  # re-exported; the sandbox workers import it directly
 
 @tool
-def create_dataframe_info(file_path: str, include_full_df: bool = True) -> DataFrameInfo:
+def create_dataframe_info(file_path: str, include_full_df: bool = False) -> DataFrameInfo:
     """
     Create a detailed DataFrameInfo object from a CSV file.
 
@@ -25,8 +39,11 @@ def create_dataframe_info(file_path: str, include_full_df: bool = True) -> DataF
         - List of column names
         - Data types for each column
         - Count of missing values per column
-        - Per-column details (unique values count, sample values, dtype, missing count)
+        - Per-column details (unique values count, sample values, dtype, missing count,
+          min/max and quantiles for numeric columns, top-k most frequent values)
         - A preview of the first 5 rows
+        - A token-budgeted digest (histograms, top-k categories, correlations and a
+          stratified sample) whose size does not grow with the number of rows
         - (Optional) The full dataset in JSON-serializable format
 
     Args:
@@ -34,8 +51,9 @@ def create_dataframe_info(file_path: str, include_full_df: bool = True) -> DataF
             Path to the CSV file to be read into a DataFrame.
         include_full_df (bool, optional):
             Whether to include the entire DataFrame as a JSON-serializable list 
-            in the `raw_dataframe` field. 
-            Defaults to False to reduce memory usage.
+            in the `raw_dataframe` field. Only sensible for tiny datasets, since the
+            whole frame ends up in the LLM context.
+            Defaults to False; the `digest` field is used instead.
 
     Returns:
         DataFrameInfo:
@@ -54,32 +72,22 @@ def create_dataframe_info(file_path: str, include_full_df: bool = True) -> DataF
         >>> df_info = create_dataframe_info("data/sales.csv", include_full_df=False)
 
     """
-    # Load the DataFrame
-    df = pd.read_csv(file_path)
+    # Load the DataFrame (shared with the snippet executors through the registry)
+    df = dataset_registry.get_frame(file_path)
     
     if df.empty:
         raise ValueError("The DataFrame is empty. Please provide a valid CSV file.")
 
-    # Create summary
-    summary = DataFrameSummary(
-        num_rows=df.shape[0],
-        num_columns=df.shape[1],
-        columns=list(df.columns),
-        dtypes=df.dtypes.astype(str).to_dict(),
-        missing_values=df.isnull().sum().to_dict()
-    )
-
-    # Detailed column info
-    columns_info = []
-    for col in df.columns:
-        col_info = ColumnInfo(
-            name=col,
-            dtype=str(df[col].dtype),
-            num_missing=int(df[col].isnull().sum()),
-            num_unique=int(df[col].nunique()),
-            sample_values=df[col].dropna().unique()[:3].tolist()  # 3 sample values
-        )
-        columns_info.append(col_info)
+    # Streamed (out-of-core) datasets come with a full-file profile; the frame is only a sample
+    profile = dataset_registry.get_profile(file_path)
+    if profile is not None:
+        summary, columns_info = profile
+    elif use_approximate_profiling(file_path):
+        # Sketch-based statistics: bounded memory per column, approximate distinct counts
+        summary, columns_info = profile_dataframe_approx(df)
+    else:
+        # Profile all columns in one vectorized pass
+        summary, columns_info = profile_dataframe(df)
 
     # Prepare DataFrameInfo
     df_info = DataFrameInfo(
@@ -87,6 +95,7 @@ def create_dataframe_info(file_path: str, include_full_df: bool = True) -> DataF
         summary=summary,
         columns_info=columns_info,
         sample_data=df.head(5).to_dict(orient="records"),
+        digest=build_dataset_digest(df, num_rows=summary.num_rows),
         raw_dataframe=df.to_dict(orient="records") if include_full_df else None
     )
 
@@ -116,49 +125,87 @@ def figure_to_base64(fig) -> str:
 def extract_plotly_base64_from_code(code: str, csv_path: str) -> FigureCodeWithImage:
     """
     Executes a given Plotly code snippet, loads a dataset from a CSV file into `data`,
-    and extracts the resulting figure as a base64-encoded image.
+    and extracts the resulting figure as a base64-encoded image, all in-process.
     """
+    figure = execute_plotly_code(code, csv_path)
+    if figure.figure_json is None:
+        return figure
 
-    # Load dataset into variable `data`
-    data = pd.read_csv(csv_path)
-    globals_vars = {"pd": pd, "data": data, "px": px}
+    figure.figure_img_base64 = figure_to_base64(json.loads(figure.figure_json))
+    return figure
 
-    try:
-        exec(code, globals_vars)
-    except Exception as e:
-        return FigureCodeWithImage(
-            code=code,
-            figure_img_base64=base64.b64encode(
-                f"Code execution failed: {str(e)}".encode("utf-8")
-            ).decode("utf-8")
-        )
 
-    # Find the first Plotly Figure object
-    fig = None
-    for var in globals_vars.values():
-        if "Figure" in str(type(var)):
-            fig = var
-            break
-
-    if not fig:
-        return FigureCodeWithImage(
-            code=code,
-            figure_img_base64=base64.b64encode(
-                b"No Plotly Figure found"
-            ).decode("utf-8")
-        )
+def render_figures(figures: list[FigureCodeWithImage]) -> None:
+    """
+    Fills `figure_img_base64` of every executed figure using the shared renderer pool.
 
-    return FigureCodeWithImage(
-        code=code,
-        figure_img_base64=figure_to_base64(fig)
+    Figures without `figure_json` (failed executions) are left untouched. Figures whose
+    export fails get status "render_failed" and the error, so no insight is requested
+    for them; their `figure_json` is kept for the interactive report.
+    """
+    pending = [figure for figure in figures if figure.figure_json is not None]
+    if not pending:
+        return
+
+    results = get_figure_renderer().render_batch([figure.figure_json for figure in pending])
+
+    for figure, result in zip(pending, results):
+        if result.image_bytes is not None:
+            figure.figure_img_base64 = base64.b64encode(result.image_bytes).decode("utf-8")
+        else:
+            figure.figure_img_base64 = base64.b64encode(
+                f"Image export failed: {result.error}".encode("utf-8")
+            ).decode("utf-8")
+            figure.status = "render_failed"
+            figure.error = f"image export failed: {result.error}"
+
+    latencies = [result.latency for result in results]
+    print(
+        f"Rendered {len(results)} figures | mean {1000 * sum(latencies) / len(latencies):.0f} ms"
+        f" | max {1000 * max(latencies):.0f} ms"
+        f" | per figure (ms): {[round(1000 * latency) for latency in latencies]}"
     )
 
 
-def convert_analysis_to_figures(codes: list[str], csv_path: str) -> FiguresCodeWithImage:
+def convert_analysis_to_figures(codes: list[str], csv_path: str, checkpoint: Optional[RunCheckpoint] = None) -> FiguresCodeWithImage:
     """
     Converts a list of code snippets into base64-encoded Plotly figure images.
+
+    Snippets run in parallel on the shared SnippetExecutor worker pool, then the
+    resulting figures are rendered as a batch on the warm FigureRendererPool.
+    Figures are returned in the same order as `codes`, and each figure's JSON is kept
+    in the figure store for the report to reuse.
+
+    In "text" insights mode, figures that `figure_summary_text` can summarize get
+    their `summary` filled and are not rendered at all.
+
+    With a `checkpoint`, snippets executed by an earlier attempt of the run reuse the
+    recorded figure, and newly executed figures are recorded.
     """
-    codes_figures = [extract_plotly_base64_from_code(code, csv_path) for code in codes]
+    restored = checkpoint.load_figures(codes) if checkpoint is not None else {}
+    pending = [code for code in codes if code not in restored]
+    executed = get_snippet_executor().run(pending, csv_path) if pending else []
+
+    if InsightsLLMConfig.insights_mode == "text":
+        for figure in executed:
+            if figure.figure_json is not None:
+                figure.summary = figure_summary_text(figure.figure_json)
+    if checkpoint is not None:
+        checkpoint.save_figures(executed)
+        if restored:
+            print(f"Reusing {len(restored)} figures recorded by an earlier attempt of this run.")
+
+    executed_by_code = iter(executed)
+    codes_figures = [restored[code] if code in restored else next(executed_by_code) for code in codes]
+
+    summarized = sum(figure.summary is not None for figure in codes_figures)
+    if summarized:
+        print(f"Summarized {summarized} figures as text; skipping their static export.")
+    render_figures([figure for figure in codes_figures if figure.summary is None])
+
+    for figure in codes_figures:
+        if figure.figure_json is not None:
+            store_figure(figure.code, csv_path, figure.figure_json)
 
     print("------------------------------------------------------------------------")
     print(f"Extracted {len(codes_figures)} figures from {len(codes)} code snippets.")
@@ -169,13 +216,48 @@ def convert_analysis_to_figures(codes: list[str], csv_path: str) -> FiguresCodeW
 
 
 
-from litellm import completion
+from litellm import acompletion
 from schemas.schemas import CodeWithInsights, CodesWithInsights
+from utils.rate_limiter import llm_rate_limiter
+from utils.image_encoding import upload_image_url, upload_signature
+from utils.disk_cache import DiskCache
 
-def convert_figure_to_insights(figure: FigureCodeWithImage, retries: int = 0) -> CodeWithInsights:
+insights_cache = DiskCache(CacheConfig.insights_cache_dir, CacheConfig.insights_cache_max_bytes)
+
+
+def insights_cache_key(figure: FigureCodeWithImage) -> str:
+    """
+    Builds the insights cache key of a figure: a hash of the image bytes,
+    the insights prompt, the model name and the upload encoding settings.
+    """
+    return DiskCache.make_key(
+        base64.b64decode(figure.figure_img_base64),
+        InsightsLLMConfig.insights_command,
+        InsightsLLMConfig.model_name,
+        upload_signature(),
+    )
+
+
+def estimate_insight_tokens(figure: FigureCodeWithImage) -> int:
+    """
+    Estimates the tokens one insight request consumes (prompt, image and answer),
+    used to reserve capacity on the tokens-per-minute limiter before sending it.
+    """
+    return (
+        len(InsightsLLMConfig.insights_command) // 4
+        + InsightsLLMConfig.estimated_tokens_per_image
+        + InsightsLLMConfig.expected_output_tokens
+    )
+
+
+async def aconvert_figure_to_insights(figure: FigureCodeWithImage, retries: int = 0, check_cache: bool = True) -> CodeWithInsights:
     """
     Converts a single FigureCodeWithImage to insights using Gemini multimodal LLM.
-    Retries insight generation upon failure, up to max_retries.
+    The chart is uploaded in the compact encoding of `upload_image_url`.
+    Identical images are answered from the on-disk insights cache, unless `check_cache`
+    is False because the caller already missed it; otherwise waits
+    on the shared LLM rate limiter before each request and
+    retries insight generation upon failure, up to max_retries.
     """
     api_key = InsightsLLMConfig.api_key
     model_name = InsightsLLMConfig.model_name
@@ -186,29 +268,41 @@ def convert_figure_to_insights(figure: FigureCodeWithImage, retries: int = 0) ->
     time_to_sleep_between_retries = InsightsLLMConfig.time_to_sleep_between_retries
 
     img_base64 = figure.figure_img_base64
+    estimated_tokens = estimate_insight_tokens(figure)
+
+    cache_key = insights_cache_key(figure)
+    cached = insights_cache.get(cache_key) if check_cache and retries == 0 else None
+    if cached is not None:
+        return CodeWithInsights(code=figure.code, insights=cached["insights"])
 
     try:
-        response = completion(
+        await llm_rate_limiter.acquire(estimated_tokens)
+        response = await acompletion(
             model=model_name,
             messages=[
                 {
                     "role": "user",
                     "content": [
                         {"type": "text", "text": insights_command},
-                        {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{img_base64}"}}
+                        {"type": "image_url", "image_url": {"url": upload_image_url(img_base64)}}
                     ]
                 }
             ],
             api_key=api_key,
         )
         insights_text = response["choices"][0]["message"]["content"]
+        if insights_text:
+            insights_cache.set(cache_key, {"insights": insights_text})
 
+        usage = response.get("usage") if hasattr(response, "get") else None
+        if usage and usage.get("total_tokens"):
+            llm_rate_limiter.adjust(usage["total_tokens"] - estimated_tokens)
 
     except Exception as e:
         if retry_upon_fall and retries < max_retries:
             print('retrying', retries, e)
-            time.sleep(time_to_sleep_between_retries)
-            return convert_figure_to_insights(figure, retries=retries + 1)
+            await asyncio.sleep(time_to_sleep_between_retries)
+            return await aconvert_figure_to_insights(figure, retries=retries + 1)
         # insights_text = f"Insight generation failed: {str(e)}"
         insights_text = ""
     
@@ -217,19 +311,314 @@ def convert_figure_to_insights(figure: FigureCodeWithImage, retries: int = 0) ->
                 code=figure.code,
                 insights=insights_text
             )
-        
-    
 
 
-def convert_figures_to_insights(figures: FiguresCodeWithImage) -> CodesWithInsights:
+def convert_figure_to_insights(figure: FigureCodeWithImage, retries: int = 0) -> CodeWithInsights:
+    """
+    Blocking wrapper around `aconvert_figure_to_insights`.
+    """
+    return run_coroutine(aconvert_figure_to_insights(figure, retries))
+
+
+def plan_insight_batches(figures: list[FigureCodeWithImage], batch_size: int = None, max_bytes: int = None) -> list[list[int]]:
+    """
+    Groups consecutive figures into insight batches of at most `batch_size` figures
+    whose upload images together stay within `max_bytes`, so large charts travel in
+    smaller batches. A figure larger than the budget gets a batch of its own.
+    Returns lists of indices into `figures`.
+    """
+    batch_size = max(1, batch_size or InsightsLLMConfig.batch_size)
+    max_bytes = max_bytes or InsightsLLMConfig.batch_max_bytes
+
+    batches, current, current_bytes = [], [], 0
+    for index, figure in enumerate(figures):
+        size = len(upload_image_url(figure.figure_img_base64))
+        if current and (len(current) == batch_size or current_bytes + size > max_bytes):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(index)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_insights_prompt(count: int) -> str:
+    """
+    Builds the prompt of a batched insight request: the usual insights command, applied
+    to each of the `count` numbered figures, with a strict JSON answer format.
+    """
+    return (
+        f"You are given {count} charts, numbered 1 to {count} in the order they appear. "
+        f"For EACH chart separately: {InsightsLLMConfig.insights_command}\n"
+        f"Answer with a JSON array only, exactly {count} objects in chart order: "
+        '[{"figure": 1, "insights": "..."}, ...]'
+    )
+
+
+def parse_batch_insights(text: str, count: int):
+    """
+    Splits the answer of a batched insight request into one insight per figure.
+    Returns a list of `count` strings (empty where a figure got no insight), or None
+    if the answer is not the expected JSON array.
+    """
+    match = re.search(r"\[.*\]", text or "", re.DOTALL)
+    if not match:
+        return None
+    try:
+        items = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(items, list):
+        return None
+
+    insights = [""] * count
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("insights"), str):
+            continue
+        number = item.get("figure", position + 1)
+        if isinstance(number, int) and 1 <= number <= count:
+            insights[number - 1] = item["insights"].strip()
+    return insights
+
+
+async def aconvert_batch_to_insights(figures: list[FigureCodeWithImage]) -> list[CodeWithInsights]:
+    """
+    Converts several figures to insights with a single multimodal request.
+
+    The figures are sent as numbered images with one shared prompt asking for a JSON
+    array of per-figure insights. Each insight is cached under the figure's own cache
+    key. If the request fails or the answer cannot be parsed, the affected figures
+    fall back to single-figure requests. The figures are expected to have missed the
+    insights cache already, so the fallbacks do not look them up (or count them) again.
+    """
+    if len(figures) == 1:
+        return [await aconvert_figure_to_insights(figures[0], check_cache=False)]
+
+    prompt = batch_insights_prompt(len(figures))
+    content = [{"type": "text", "text": prompt}]
+    for number, figure in enumerate(figures, start=1):
+        content.append({"type": "text", "text": f"Chart {number}:"})
+        content.append({"type": "image_url", "image_url": {"url": upload_image_url(figure.figure_img_base64)}})
+
+    estimated_tokens = len(prompt) // 4 + len(figures) * (
+        InsightsLLMConfig.estimated_tokens_per_image + InsightsLLMConfig.expected_output_tokens
+    )
+
+    insights = None
+    try:
+        await llm_rate_limiter.acquire(estimated_tokens)
+        response = await acompletion(
+            model=InsightsLLMConfig.model_name,
+            messages=[{"role": "user", "content": content}],
+            api_key=InsightsLLMConfig.api_key,
+        )
+        insights = parse_batch_insights(response["choices"][0]["message"]["content"], len(figures))
+
+        usage = response.get("usage") if hasattr(response, "get") else None
+        if usage and usage.get("total_tokens"):
+            llm_rate_limiter.adjust(usage["total_tokens"] - estimated_tokens)
+    except Exception as e:
+        print(f"Batched insight request failed: {e}")
+
+    if insights is None:
+        print(f"Falling back to single-figure requests for a batch of {len(figures)} figures.")
+        return list(await asyncio.gather(*[aconvert_figure_to_insights(figure, check_cache=False) for figure in figures]))
+
+    results = []
+    for figure, text in zip(figures, insights):
+        if text:
+            insights_cache.set(insights_cache_key(figure), {"insights": text})
+            results.append(CodeWithInsights(code=figure.code, insights=text))
+        else:
+            results.append(await aconvert_figure_to_insights(figure, check_cache=False))
+    return results
+
+
+def summary_insights_cache_key(figure: FigureCodeWithImage) -> str:
+    """
+    Builds the insights cache key of a summarized figure: a hash of the summary,
+    the text insights prompt and the text model name.
+    """
+    return DiskCache.make_key(
+        figure.summary,
+        InsightsLLMConfig.text_insights_command,
+        InsightsLLMConfig.text_model_name,
+    )
+
+
+async def aconvert_summary_to_insights(figure: FigureCodeWithImage, retries: int = 0) -> CodeWithInsights:
+    """
+    Converts a summarized figure to insights with a text-only request to
+    `InsightsLLMConfig.text_model_name`. Uses the insights cache, the shared rate
+    limiter and the retry settings the same way as `aconvert_figure_to_insights`.
+    """
+    prompt = f"{InsightsLLMConfig.text_insights_command}\n\n{figure.summary}"
+    estimated_tokens = len(prompt) // 4 + InsightsLLMConfig.expected_output_tokens
+
+    cache_key = summary_insights_cache_key(figure)
+    cached = insights_cache.get(cache_key) if retries == 0 else None
+    if cached is not None:
+        return CodeWithInsights(code=figure.code, insights=cached["insights"])
+
+    try:
+        await llm_rate_limiter.acquire(estimated_tokens)
+        response = await acompletion(
+            model=InsightsLLMConfig.text_model_name,
+            messages=[{"role": "user", "content": prompt}],
+            api_key=InsightsLLMConfig.api_key,
+        )
+        insights_text = response["choices"][0]["message"]["content"]
+        if insights_text:
+            insights_cache.set(cache_key, {"insights": insights_text})
+
+        usage = response.get("usage") if hasattr(response, "get") else None
+        if usage and usage.get("total_tokens"):
+            llm_rate_limiter.adjust(usage["total_tokens"] - estimated_tokens)
+
+    except Exception as e:
+        if InsightsLLMConfig.retry_upon_fall and retries < InsightsLLMConfig.max_retries:
+            print('retrying', retries, e)
+            await asyncio.sleep(InsightsLLMConfig.time_to_sleep_between_retries)
+            return await aconvert_summary_to_insights(figure, retries=retries + 1)
+        insights_text = ""
+
+    return CodeWithInsights(code=figure.code, insights=insights_text)
+
+
+async def dispatch_summaries_to_insights(
+    figures: list[FigureCodeWithImage], max_in_flight: int = None, on_result: Optional[Callable[[CodeWithInsights], None]] = None
+) -> list[CodeWithInsights]:
+    """
+    Sends text insight requests for summarized figures, with up to `max_in_flight`
+    requests outstanding at once. `on_result` is called with each result as soon as
+    it arrives. Results keep the input order.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight or InsightsLLMConfig.max_concurrent_requests)
+
+    async def _convert(figure: FigureCodeWithImage) -> CodeWithInsights:
+        async with semaphore:
+            result = await aconvert_summary_to_insights(figure)
+        if on_result:
+            on_result(result)
+        return result
+
+    return await asyncio.gather(*[_convert(figure) for figure in figures])
+
+
+async def dispatch_insights(
+    figures: list[FigureCodeWithImage], on_result: Optional[Callable[[CodeWithInsights], None]] = None
+) -> list[CodeWithInsights]:
+    """
+    Routes summarized figures to text requests and the others to image requests,
+    running both concurrently. `on_result` is called with each result as soon as it
+    arrives. Results keep the input order.
+    """
+    text_indices = [index for index, figure in enumerate(figures) if figure.summary is not None]
+    image_indices = [index for index, figure in enumerate(figures) if figure.summary is None]
+
+    text_results, image_results = await asyncio.gather(
+        dispatch_summaries_to_insights([figures[index] for index in text_indices], on_result=on_result),
+        dispatch_figures_to_insights([figures[index] for index in image_indices], on_result=on_result),
+    )
+
+    results: list = [None] * len(figures)
+    for index, result in zip(text_indices + image_indices, list(text_results) + list(image_results)):
+        results[index] = result
+    if text_indices:
+        print(f"Sent {len(text_indices)} figures as text summaries and {len(image_indices)} as images.")
+    return results
+
+
+def run_coroutine(coro):
+    """
+    Runs a coroutine to completion from synchronous code.
+
+    Uses `asyncio.run` when the calling thread has no running event loop (the usual
+    case for CrewAI tool calls), and a short-lived helper thread otherwise.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+async def dispatch_figures_to_insights(
+    figures: list[FigureCodeWithImage], max_in_flight: int = None, on_result: Optional[Callable[[CodeWithInsights], None]] = None
+) -> list[CodeWithInsights]:
+    """
+    Sends insight requests for all figures with up to `max_in_flight` requests
+    outstanding at once. Pacing is left to the shared requests/tokens-per-minute
+    limiter, so throughput follows the provider quota. `on_result` is called with
+    each result as soon as it arrives. Results keep the input order.
+
+    With `InsightsLLMConfig.batch_size` above 1, figures not found in the insights
+    cache are packed into batched requests (see `plan_insight_batches`), cutting the
+    number of calls by roughly the batch size.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight or InsightsLLMConfig.max_concurrent_requests)
+    completed = 0
+
+    def _report(figure: FigureCodeWithImage, result: CodeWithInsights) -> None:
+        nonlocal completed
+        if on_result:
+            on_result(result)
+        if result.insights:
+            completed += 1
+            print(f"Processed figure with code: {figure.code[:50]}... | Insights: {result.insights[:100]}...")
+            print(f"Total processed so far: {completed} figures")
+
+    async def _convert(figure: FigureCodeWithImage) -> CodeWithInsights:
+        async with semaphore:
+            result = await aconvert_figure_to_insights(figure)
+        _report(figure, result)
+        return result
+
+    if InsightsLLMConfig.batch_size <= 1:
+        return await asyncio.gather(*[_convert(figure) for figure in figures])
+
+    results: list = [None] * len(figures)
+    uncached = []
+    for index, figure in enumerate(figures):
+        cached = insights_cache.get(insights_cache_key(figure))
+        if cached is not None:
+            results[index] = CodeWithInsights(code=figure.code, insights=cached["insights"])
+            if on_result:
+                on_result(results[index])
+        else:
+            uncached.append(index)
+
+    batches = [[uncached[i] for i in batch] for batch in plan_insight_batches([figures[i] for i in uncached])]
+
+    async def _convert_batch(batch: list[int]) -> None:
+        async with semaphore:
+            batch_results = await aconvert_batch_to_insights([figures[i] for i in batch])
+        for index, result in zip(batch, batch_results):
+            results[index] = result
+            _report(figures[index], result)
+
+    await asyncio.gather(*[_convert_batch(batch) for batch in batches])
+    if uncached:
+        print(f"Sent {len(uncached)} figures in {len(batches)} batched insight request(s).")
+    return results
+
+
+def convert_figures_to_insights(
+    figures: FiguresCodeWithImage, on_result: Optional[Callable[[CodeWithInsights], None]] = None
+) -> CodesWithInsights:
     """
     Converts a collection of Plotly figures (serialized as code + base64 images) into
     human-readable insights using a multimodal Gemini LLM.
 
     Workflow:
-        1. Iterates over each `FigureCodeWithImage` object in the input.
-        2. For each figure, calls `convert_figure_to_insights`, which sends the figure’s
-           code and base64-encoded image to the Gemini model.
+        1. Dispatches every `FigureCodeWithImage` object in the input concurrently,
+           keeping at most `InsightsLLMConfig.max_concurrent_requests` requests in flight.
+        2. Each request waits on the shared token-bucket limiter (built from
+           `LLMConfig.max_rpm` and `LLMConfig.max_tpm`) and then sends the figure’s
+           base64-encoded image to the Gemini model.
         3. Collects the returned insights (wrapped as `CodeWithInsights`) for all figures.
         4. Aggregates them into a single `CodesWithInsights` object.
 
@@ -238,7 +627,8 @@ def convert_figures_to_insights(figures: FiguresCodeWithImage) -> CodesWithInsig
             A container holding multiple figures, where each figure has:
                 - `code`: The original Plotly code snippet that produced the figure.
                 - `figure_img_base64`: A base64-encoded PNG representation of the figure.
-        
+        on_result (Callable[[CodeWithInsights], None], optional):
+            Called with each figure's result as soon as it arrives.
 
     Returns:
         CodesWithInsights:
@@ -246,64 +636,123 @@ def convert_figures_to_insights(figures: FiguresCodeWithImage) -> CodesWithInsig
             the original Plotly code with generated textual insights from the LLM.
 
     Notes:
-        - If any figure fails during insight generation, the returned insight will
-          contain the error message instead of analysis.
+        - Figures with a `summary` (text insights mode) are sent as text to the cheaper
+          `InsightsLLMConfig.text_model_name` instead of as an image.
+        - Figures whose snippet failed to execute or whose image failed to export
+          (`status` other than "ok") are not sent.
+        - Figures whose insight generation fails are left out of the result.
     """
 
-    all_codes_with_insights = []
-
-    n = 0
-
+    # Snippets that failed (error, timeout, resource limits, image export) have nothing worth describing
+    executed = [figure for figure in figures.figures if figure.status == "ok"]
     for figure in figures.figures:
-        time.sleep(InsightsLLMConfig.time_to_sleep_between_requests)
-        result = convert_figure_to_insights(figure)
-      
-        if not result.insights:
-            continue
-
-        all_codes_with_insights.append(result)
-        print(f"Processed figure with code: {figure.code[:50]}... | Insights: {result.insights[:100]}...")
-        n += 1 
-        print(f"Total processed so far: {n} figures")
-    
+        if figure.status != "ok":
+            print(f"Skipping insights for failed figure ({figure.status}): {figure.error}")
 
-    return CodesWithInsights(codes_with_insights=all_codes_with_insights)
+    cache_stats = insights_cache.stats()
+    results = run_coroutine(dispatch_insights(executed, on_result=on_result))
+    all_codes_with_insights = [result for result in results if result.insights]
 
+    print(
+        f"Insights cache: {insights_cache.hits - cache_stats['hits']} hits, "
+        f"{insights_cache.misses - cache_stats['misses']} misses "
+        f"(lifetime {insights_cache.hits} hits / {insights_cache.misses} misses)"
+    )
 
-@tool
-def convert_codes_to_insights(codes: list[str], csv_path: str) -> CodesWithInsights:
-    """
-    Converts a list of Plotly code snippets into structured insights using the Gemini multimodal LLM.
-    
-    Workflow:
-        1. Takes user-provided Plotly code snippets.
-        2. Executes the snippets on the given CSV dataset to generate Plotly figures.
-        3. Converts each figure into a base64-encoded image.
-        4. Sends each image to the Gemini multimodal model to extract 4–6 narrative-style insights.
-        5. Returns all insights combined into a CodesWithInsights object.
+    return CodesWithInsights(codes_with_insights=all_codes_with_insights)
 
-    Args:
-        codes (list[str]): A list of Python code snippets that generate Plotly figures.
-        csv_path (str): The path to the CSV dataset that the code snippets depend on.
 
-    Returns:
-        CodesWithInsights:
-            A structured object containing the original code snippets and
-            their corresponding narrative-driven insights, suitable for
-            reporting, dashboards, or storytelling use cases.
-
-    Raises:
-        ValueError: If no code snippets are provided or if the CSV path is invalid.
-    """
+def _convert_codes_to_insights(codes: list[str], csv_path: str, label: str = "") -> CodesWithInsights:
+    # Body of the `convert_codes_to_insights` tool; `label` names the claiming branch.
     if not codes:
         raise ValueError("No code snippets provided for conversion into insights.")
     if not csv_path:
         raise ValueError("CSV path must be provided.")
 
-    # Step 1: Convert code snippets into figures with base64 images
-    figures = convert_analysis_to_figures(codes, csv_path)
+    # Step 1: Reject (or regenerate) snippets that would fail before paying for them
+    codes = validate_snippets(codes, csv_path)
+    run_context = get_run_context(csv_path)
+    if run_context is not None:
+        codes = run_context.claim_snippets(codes, label)
+    else:
+        codes, dropped = dedupe_snippets(codes)
+        if dropped:
+            print(f"Dropped {dropped} duplicate snippet(s); saved {dropped} render(s) and {dropped} insight call(s).")
+    if not codes:
+        return CodesWithInsights(codes_with_insights=[])
+
+    # Snippets whose insight an earlier attempt of this run already recorded are not redone
+    checkpoint = run_context.checkpoint if run_context is not None else None
+    recorded = checkpoint.load_insights(codes) if checkpoint is not None else {}
+    pending = [code for code in codes if code not in recorded]
+    if recorded:
+        print(f"Resuming insights: {len(recorded)} of {len(codes)} figures already done.")
+
+    new_insights = {}
+    if pending:
+        # Step 2: Convert code snippets into figures with base64 images
+        figures = convert_analysis_to_figures(pending, csv_path, checkpoint)
+
+        # Step 3: Convert those figures into insights using Gemini multimodal
+        on_result = checkpoint.save_insight if checkpoint is not None else None
+        converted = convert_figures_to_insights(figures, on_result=on_result)
+        new_insights = {result.code: result for result in converted.codes_with_insights}
 
-    # Step 2: Convert those figures into insights using Gemini multimodal
-    return convert_figures_to_insights(figures)
+    return CodesWithInsights(codes_with_insights=[
+        recorded.get(code) or new_insights[code] for code in codes if code in recorded or code in new_insights
+    ])
 
 
+def codes_to_insights_tool(label: str = ""):
+    """
+    Build the `convert_codes_to_insights` tool for one category branch.
+
+    The label identifies the branch in the run's snippet claims: snippets another
+    branch already claimed are dropped as duplicates, while a retried call from the
+    same branch gets its own snippets back.
+
+    Args:
+        label (str, optional): Branch name, e.g. the checkpoint stage name "simple_insights".
+
+    Returns:
+        BaseTool: The CrewAI tool.
+    """
+    def convert_codes_to_insights(codes: list[str], csv_path: str) -> CodesWithInsights:
+        """
+        Converts a list of Plotly code snippets into structured insights using the Gemini multimodal LLM.
+    
+        Workflow:
+            1. Takes user-provided Plotly code snippets.
+            2. Validates them statically (columns, `fig` assignment, no I/O or `show()`);
+               invalid ones are regenerated in one batch or dropped.
+               Snippets identical (up to naming and titles) to another one in the list,
+               or to one another category already handled in the current run, are dropped as well.
+            3. Executes the snippets on the given CSV dataset to generate Plotly figures.
+            4. Converts each figure into a base64-encoded image; in "text" insights mode,
+               bar, line, histogram and box charts are summarized numerically instead.
+            5. Sends each image to the Gemini multimodal model (or each summary to the text
+               model) to extract 4–6 narrative-style insights.
+            6. Returns all insights combined into a CodesWithInsights object.
+
+            When the run has a checkpoint, each insight is recorded as soon as it arrives,
+            and on resume snippets with a recorded insight skip steps 3–5.
+
+        Args:
+            codes (list[str]): A list of Python code snippets that generate Plotly figures.
+            csv_path (str): The path to the CSV dataset that the code snippets depend on.
+
+        Returns:
+            CodesWithInsights:
+                A structured object containing the original code snippets and
+                their corresponding narrative-driven insights, suitable for
+                reporting, dashboards, or storytelling use cases.
+
+        Raises:
+            ValueError: If no code snippets are provided or if the CSV path is invalid.
+        """
+        return _convert_codes_to_insights(codes, csv_path, label)
+
+    return tool(convert_codes_to_insights)
+
+
+convert_codes_to_insights = codes_to_insights_tool()